@@ -1,26 +1,99 @@
 # Advisor Agent
 # agents/advisor.py
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple
+from config.settings import TIMEZONE
 
-def overspend_report(df: pd.DataFrame, budgets: Dict[str, float]) -> List[Tuple[str, float, float, float]]:
+def _local_day(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    if ts.tz is not None:
+        ts = ts.tz_convert(TIMEZONE).tz_localize(None)
+    return ts.normalize()
+
+def budget_months(start, end) -> float:
+    """
+    Length of [start, end] in budget months: every day counts 1/len(its month),
+    so a full calendar month is 1.0, a week about 0.23 and a year 12.0.
+    """
+    days = pd.date_range(_local_day(start), _local_day(end), freq="D")
+    return float((1.0 / days.days_in_month.to_numpy()).sum())
+
+def budget_span(df: pd.DataFrame, start=None, end=None) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    First and last local day budgets are measured over. A given start/end is a
+    cut into the data and is used as is (its month is prorated); a missing side
+    is rounded out to the calendar month of df's first/last transaction, so data
+    that merely begins or ends mid-month is held to the whole month's budget.
+    """
+    if start is not None and end is not None:
+        return _local_day(start), _local_day(end)
+    dates = pd.to_datetime(df["date"])
+    first = _local_day(start) if start is not None else _local_day(dates.min()).replace(day=1)
+    last = _local_day(end) if end is not None else _local_day(dates.max()) + pd.offsets.MonthEnd(0)
+    return first, last
+
+def budget_vector(budgets: Dict[str, float], categories) -> pd.Series:
+    """Monthly budgets aligned to `categories` (NaN where a category has no budget)."""
+    return pd.Series(budgets, dtype=float).reindex(pd.Index(categories))
+
+def overspend_report(df: pd.DataFrame, budgets: Dict[str, float],
+                     start=None, end=None) -> List[Tuple[str, float, float, float]]:
     """
     Returns list of (category, actual, budget, pct_over) where actual > budget.
+    Monthly budgets are prorated to budget_months of the budget_span: start/end
+    where the period cuts into the data, whole calendar months otherwise.
     """
     if df.empty:
         return []
-    by_cat = df.groupby("category")["amount"].sum()
-    rows = []
-    for cat, actual in by_cat.items():
-        b = budgets.get(cat, None)
-        if b and actual > b:
-            pct = ((actual - b) / b) * 100.0
-            rows.append((cat, actual, b, pct))
+    by_cat = df.groupby("category", observed=True)["amount"].sum()
+    factor = budget_months(*budget_span(df, start, end))
+    budget = budget_vector(budgets, by_cat.index).to_numpy() * factor
+    actual = by_cat.to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        over = (budget > 0) & (actual > budget)
+        pct = (actual - budget) / budget * 100.0
+    rows = list(zip(by_cat.index[over], actual[over], budget[over], pct[over]))
     rows.sort(key=lambda x: x[3], reverse=True)
     return rows
 
-def advice_text(df: pd.DataFrame, budgets: Dict[str, float]) -> str:
-    overs = overspend_report(df, budgets)
+def monthly_spend(df: pd.DataFrame) -> pd.DataFrame:
+    """Spend per calendar month x category (one grouped pass; months as month-start dates)."""
+    if df.empty:
+        return pd.DataFrame()
+    dates = pd.to_datetime(df["date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    month = dates.to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+    spend = df.groupby([month, df["category"]], observed=True)["amount"].sum().unstack(fill_value=0.0)
+    spend.index = pd.DatetimeIndex(spend.index, name="month")
+    spend.columns = pd.Index(spend.columns.astype(str), name="category")
+    return spend
+
+def overspend_matrix(df: pd.DataFrame, budgets: Dict[str, float],
+                     start=None, end=None) -> pd.DataFrame:
+    """
+    Month x category percentage over budget (negative = under, NaN = no budget)
+    for the whole of df in one pass. Only the months start and end cut into
+    get a prorated budget (budget_span); pass None for a side the period does
+    not cut, e.g. a range that starts at the first transaction.
+    """
+    spend = monthly_spend(df)
+    if spend.empty:
+        return spend
+    first, last = (np.datetime64(day, "ns") for day in budget_span(df, start, end))
+    month_start = spend.index.to_numpy()
+    month_end = (spend.index + pd.offsets.MonthEnd(0)).to_numpy()
+    covered = (np.minimum(month_end, last) - np.maximum(month_start, first)) // np.timedelta64(1, "D") + 1
+    months = np.clip(covered, 0, None) / spend.index.days_in_month.to_numpy()
+    budget = np.outer(months, budget_vector(budgets, spend.columns).to_numpy())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = (spend.to_numpy() - budget) / budget * 100.0
+    pct[~(budget > 0)] = np.nan
+    return pd.DataFrame(pct, index=spend.index, columns=spend.columns)
+
+def advice_text(df: pd.DataFrame, budgets: Dict[str, float], start=None, end=None) -> str:
+    overs = overspend_report(df, budgets, start=start, end=end)
     if not overs:
         return "Good job! You are within budget for all categories in this period."
     lines = ["Overspending detected:"]
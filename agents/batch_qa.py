@@ -0,0 +1,82 @@
+# Batch question answering (nightly jobs, many users)
+# agents/batch_qa.py
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+import pandas as pd
+from config.settings import DEFAULT_BUDGETS
+from agents.chatbot import parse_question, _period_bounds, _answer, _now
+from utils.daterange import slice_by_date
+from utils.cube import category_totals
+from utils.ingest import pool_context
+
+Answer = Tuple[str, Optional[dict]]
+
+def answer_dataset(df: pd.DataFrame, questions: Sequence[str], budgets: dict, monthly_income: float,
+                   now: Optional[pd.Timestamp] = None, figures: bool = False) -> List[Answer]:
+    """
+    Answer several questions about one dataset (raw rows or a cube). Questions
+    are grouped by resolved period, and each period is sliced and reduced to
+    category totals once; every answer for it is computed from those totals.
+    Returns (text, Plotly figure spec as a JSON-able dict or None) per question.
+    """
+    if df.empty:
+        return [("No data available. Please upload a CSV first.", None)] * len(questions)
+    now = now if now is not None else _now()
+    queries = [parse_question(q.strip()) for q in questions]
+    by_period: Dict[str, List[int]] = {}
+    for i, query in enumerate(queries):
+        by_period.setdefault(query.period, []).append(i)
+
+    out: List[Answer] = [None] * len(queries)
+    for label, positions in by_period.items():
+        start, end = _period_bounds(label, df, now)
+        totals = category_totals(slice_by_date(df, start, end))
+        for i in positions:
+            text, fig = _answer(totals, queries[i], budgets, monthly_income, start, end, figures=figures)
+            out[i] = (text, json.loads(fig.to_json()) if fig is not None else None)
+    return out
+
+def answer_batch(datasets: Dict[Hashable, pd.DataFrame], requests: Sequence[Tuple[Hashable, str]],
+                 budgets: Optional[Dict[Hashable, dict]] = None,
+                 monthly_income: Optional[Dict[Hashable, float]] = None,
+                 figures: bool = False, max_workers: Optional[int] = None,
+                 now: Optional[pd.Timestamp] = None) -> List[Answer]:
+    """
+    Answer many (dataset id, question) pairs, e.g. a fixed question set for every user.
+    datasets: {dataset id: transactions or cube}
+    budgets / monthly_income: per dataset id; DEFAULT_BUDGETS and 0 where missing.
+    Each dataset is handled by one worker process (answer_dataset), and all use
+    the same `now` so relative periods agree. Answers come back in request order.
+    """
+    unknown = {ds for ds, _ in requests if ds not in datasets}
+    if unknown:
+        raise KeyError(f"Unknown dataset(s): {sorted(map(str, unknown))}")
+    budgets = budgets or {}
+    monthly_income = monthly_income or {}
+    now = now if now is not None else _now()
+
+    jobs: Dict[Hashable, List[int]] = {}
+    for i, (ds, _) in enumerate(requests):
+        jobs.setdefault(ds, []).append(i)
+
+    def args(ds):
+        questions = [requests[i][1] for i in jobs[ds]]
+        return (datasets[ds], questions, budgets.get(ds, DEFAULT_BUDGETS),
+                float(monthly_income.get(ds, 0.0)), now, figures)
+
+    out: List[Answer] = [None] * len(requests)
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        for ds, positions in jobs.items():
+            for i, answer in zip(positions, answer_dataset(*args(ds))):
+                out[i] = answer
+        return out
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(["agents.batch_qa"])) as pool:
+        futures = {ds: pool.submit(answer_dataset, *args(ds)) for ds in jobs}
+        for ds, fut in futures.items():
+            for i, answer in zip(jobs[ds], fut.result()):
+                out[i] = answer
+    return out
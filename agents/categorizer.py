@@ -1,7 +1,10 @@
 # Categorizer Agent
 # agents/categorizer.py
 import re
+import numpy as np
 import pandas as pd
+from utils.instrument import instrumented
+from utils.preprocess import extract_merchants
 
 CATEGORY_RULES = {
     "Food": ["swiggy","zomato","restaurant","cafe","eatfit","food","domino","pizza","kfc","mcd"],
@@ -28,10 +31,49 @@ def _classify_desc(text: str) -> str:
                 return cat
     return "Others"
 
-def categorize_transactions(df: pd.DataFrame) -> pd.DataFrame:
+# One alternation per category, in rule order. Priority is by category (not by
+# match position), so each pass only scans descriptions still unmatched. The
+# Arrow-backed string dtype runs the regex over the whole column natively.
+_CATEGORY_PATTERNS = [
+    (cat, "|".join(re.escape(k) for k in keywords))
+    for cat, keywords in CATEGORY_RULES.items()
+    if keywords
+]
+
+def classify_descriptions(descriptions: pd.Series) -> pd.Series:
+    """
+    Batch equivalent of descriptions.map(_classify_desc).
+    Each distinct description is classified once.
+    """
+    codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+    pending = pd.Series([str(u).lower() for u in uniques], dtype="string[pyarrow]")
+    labels = np.full(len(pending), "Others", dtype=object)
+    for cat, pattern in _CATEGORY_PATTERNS:
+        if pending.empty:
+            break
+        hit = pending.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        labels[pending.index[hit]] = cat
+        pending = pending[~hit]
+    return pd.Series(labels[codes], index=descriptions.index, dtype=object)
+
+@instrumented("categorize_transactions")
+def categorize_transactions(df: pd.DataFrame, fallback: bool = True) -> pd.DataFrame:
+    """
+    Label transactions with CATEGORY_RULES and their canonical 'merchant'. Rules
+    match the full narration (classify_descriptions, once per distinct one), so
+    categories are exactly those of _classify_desc. With `fallback`,
+    descriptions no rule matches go to the learned model (agents.ml_categorizer)
+    when one is trained.
+    """
     d = df.copy()
+    d["merchant"] = extract_merchants(d["description"])
     # incomes: if income > expense mark as Income
-    d["category"] = d["description"].map(_classify_desc)
+    d["category"] = classify_descriptions(d["description"])
+    if fallback:
+        others = (d["category"] == "Others").to_numpy()
+        if others.any():
+            from agents.ml_categorizer import refine_others  # sklearn only loads with a model
+            d.loc[others, "category"] = refine_others(d.loc[others, "description"])
     # If it's clearly income by value, override
     is_income = d["income"].fillna(0) > d["expense"].fillna(0)
     d.loc[is_income, "category"] = "Income"
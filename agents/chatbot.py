@@ -125,57 +125,91 @@
 # agents/chatbot.py
 import re
 import pandas as pd
+from collections import OrderedDict
 from datetime import timedelta
-from typing import Tuple, Optional
-from config.settings import TIMEZONE
+from typing import Hashable, NamedTuple, Tuple, Optional
+from config.settings import TIMEZONE, ANSWER_CACHE_ENTRIES
 from utils.visualization import bar_top_categories
-import pytz
+from utils.daterange import slice_by_date, date_bounds
+from agents.advisor import overspend_report, budget_months
+from utils.instrument import instrumented
+import utils.instrument as instrument
 
 def _now():
     return pd.Timestamp.now(tz=TIMEZONE)
 
-def _period_from_text(text: str, df: pd.DataFrame) -> Tuple[pd.Timestamp, pd.Timestamp, str]:
-    text = text.lower()
-    now = _now()
-    # default: this month
-    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    end   = now
-
-    label = "this month"
-
-    if "last week" in text:
-        end   = now
-        start = end - timedelta(days=7)
-        label = "last week"
-    elif "this week" in text:
-        weekday = now.weekday()  # Monday=0
-        start = (now - pd.Timedelta(days=weekday)).normalize()
-        end = now
-        label = "this week"
-    elif "last month" in text:
-        first_this_month = now.replace(day=1)
+# Every keyword the router understands, matched in one scan of the lowered question
+_TOKEN_RE = re.compile(r"""
+    (?P<period>last\ week|this\ week|last\ month|this\ month|all\ time|overall)
+  | (?P<balance>remaining|balance|left|saving)
+  | (?P<overspend>overspend|over\ spend|exceed|over\ budget)
+  | (?P<total>total)
+  | (?P<spend>spent|spend|expense)
+  | (?P<top>top)(?:\s+(?P<n>\d+))?
+  | (?P<categor>categor)
+""", re.VERBOSE)
+
+# When a question names several periods, the first one listed here wins
+_PERIOD_PRIORITY = ["last week", "this week", "last month", "this month", "overall"]
+
+class Query(NamedTuple):
+    intent: str            # balance | overspend | total | top | summary
+    period: str            # label from _PERIOD_PRIORITY ("this month" by default)
+    top_n: int
+
+def parse_question(question: str, default_top_n: int = 5) -> Query:
+    """Route a question to an intent, a period label and a top-N in a single regex pass."""
+    seen, periods, top_n = set(), set(), None
+    for m in _TOKEN_RE.finditer(question.lower()):
+        kind = m.lastgroup if m.lastgroup != "n" else "top"
+        seen.add(kind)
+        if kind == "period":
+            periods.add("overall" if m.group("period") == "all time" else m.group("period"))
+        elif kind == "top" and top_n is None and m.group("n"):
+            top_n = max(1, int(m.group("n")))
+
+    if "balance" in seen:
+        intent = "balance"
+    elif "overspend" in seen:
+        intent = "overspend"
+    elif "total" in seen and "spend" in seen:
+        intent = "total"
+    elif "top" in seen and "categor" in seen:
+        intent = "top"
+    else:
+        intent = "summary"
+    period = next((p for p in _PERIOD_PRIORITY if p in periods), "this month")
+    return Query(intent, period, top_n or default_top_n)
+
+def _period_bounds(label: str, df: pd.DataFrame, now: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    # whole local days, so the day-level cube (rows at midnight) and timestamped
+    # raw rows select the same transactions
+    today_end = now.normalize() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    if label == "last week":
+        return (now - timedelta(days=7)).normalize(), today_end
+    if label == "this week":
+        return (now - pd.Timedelta(days=now.weekday())).normalize(), today_end  # Monday=0
+    if label == "last month":
+        first_this_month = now.normalize().replace(day=1)
         end = first_this_month - pd.Timedelta(seconds=1)
         start = (first_this_month - pd.offsets.MonthBegin(1)).tz_convert(TIMEZONE)
-        label = "last month"
-    elif "this month" in text:
-        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        end = now
-        label = "this month"
-    elif "all time" in text or "overall" in text:
-        start = df["date"].min()
-        end = df["date"].max()
-        label = "overall"
-
-    return start, end, label
+        return start, end
+    if label == "overall":
+        # whole calendar months: the same rows, with budgets for full months rather
+        # than prorated to the days between the first and last transaction
+        first, last = df["date"].min().normalize(), df["date"].max().normalize()
+        return first.replace(day=1), last + pd.offsets.MonthEnd(0) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    return now.normalize().replace(day=1), today_end
 
 def _filter_period(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
-    return df[(df["date"] >= start) & (df["date"] <= end)]
+    # binary search on date-sorted frames (utils.daterange.sort_by_date), mask otherwise
+    return slice_by_date(df, start, end)
 
 def _total_spent(d: pd.DataFrame) -> float:
     return d["amount"].sum()
 
 def _top_category(d: pd.DataFrame) -> Optional[Tuple[str, float]]:
-    g = d.groupby("category")["amount"].sum().sort_values(ascending=False)
+    g = d.groupby("category", observed=True)["amount"].sum().sort_values(ascending=False)
     g = g[g > 0]
     if g.empty:
         return None
@@ -183,38 +217,53 @@ def _top_category(d: pd.DataFrame) -> Optional[Tuple[str, float]]:
     val = g.iloc[0]
     return cat, float(val)
 
-def _extract_top_n(text: str, default: int = 5) -> int:
-    m = re.search(r"top\s+(\d+)", text.lower())
-    if m:
-        return max(1, int(m.group(1)))
-    return default
+class AnswerCache:
+    """LRU of chatbot answers with hit/miss counters (keep one per session)."""
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        if key in self._entries:
+            self.hits += 1
+            instrument.count("answer_cache_hit")
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        instrument.count("answer_cache_miss")
+        return None
 
-def answer_question(df: pd.DataFrame, question: str, budgets: dict, monthly_income: float) -> Tuple[str, Optional[object]]:
-    """
-    Returns (answer_text, plotly_fig or None)
-    """
-    if df.empty:
-        return "No data available. Please upload a CSV first.", None
+    def put(self, key, answer):
+        self._entries[key] = answer
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
 
-    q = question.strip()
-    start, end, label = _period_from_text(q, df)
-    d = _filter_period(df, start, end)
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
 
+def _budgets_key(budgets: dict) -> int:
+    return hash(tuple(sorted((str(k), float(v)) for k, v in budgets.items())))
+
+def _answer(d: pd.DataFrame, query: Query, budgets: dict, monthly_income: float,
+            start=None, end=None, figures: bool = True) -> Tuple[str, Optional[object]]:
+    # d: the rows (or category totals) of the period [start, end], against which
+    # monthly budgets are prorated; figures=False skips building charts
+    label = query.period
     if d.empty:
         return f"No transactions found for {label}.", None
 
-    ql = q.lower()
-
     # Remaining balance queries
-    if "remaining" in ql or "balance" in ql or "left" in ql or "saving" in ql:
+    if query.intent == "balance":
         total = _total_spent(d)
         remaining = monthly_income - total
         return f"Your remaining balance {label}: ₹{remaining:,.0f} (Income ₹{monthly_income:,.0f} - Spent ₹{total:,.0f}).", None
 
     # Overspend question
-    if "overspend" in ql or "over spend" in ql or "exceed" in ql or "over budget" in ql:
-        from agents.advisor import overspend_report
-        rows = overspend_report(d, budgets)
+    if query.intent == "overspend":
+        rows = overspend_report(d, budgets, start=start, end=end)
         if not rows:
             return f"No overspending detected {label}. 🎉", None
         odf = pd.DataFrame(rows, columns=["category","actual","budget","pct_over"])
@@ -222,18 +271,20 @@ def answer_question(df: pd.DataFrame, question: str, budgets: dict, monthly_inco
             [f"- {r.category}: ₹{r.actual:,.0f} (budget ₹{r.budget:,.0f}) — {r.pct_over:.0f}% over"
              for r in odf.itertuples()]
         )
+        if not figures:
+            return text, None
         fig = bar_top_categories(d[d["category"].isin(odf["category"])], top_n=len(odf), title="Overspent Categories")
         return text, fig
 
     # Total spent
-    if "total" in ql and ("spent" in ql or "spend" in ql or "expense" in ql):
+    if query.intent == "total":
         total = _total_spent(d)
         return f"Total spent {label}: ₹{total:,.0f}.", None
 
     # Top categories
-    if "top" in ql and "categor" in ql:
-        n = _extract_top_n(ql, default=5)
-        fig = bar_top_categories(d, top_n=n, title=f"Top {n} Categories ({label})")
+    if query.intent == "top":
+        n = query.top_n
+        fig = bar_top_categories(d, top_n=n, title=f"Top {n} Categories ({label})") if figures else None
         cat = _top_category(d)
         if cat:
             return f"Top {n} categories {label} shown below. Biggest: {cat[0]} (₹{cat[1]:,.0f}).", fig
@@ -246,3 +297,34 @@ def answer_question(df: pd.DataFrame, question: str, budgets: dict, monthly_inco
     if cat:
         return f"{label.title()} — Total spent ₹{total:,.0f}. Biggest category: {cat[0]} (₹{cat[1]:,.0f}).", None
     return f"{label.title()} — Total spent ₹{total:,.0f}.", None
+
+@instrumented("answer_question")
+def answer_question(df: pd.DataFrame, question: str, budgets: dict, monthly_income: float,
+                    version: Optional[Hashable] = None, cache: Optional[AnswerCache] = None
+                    ) -> Tuple[str, Optional[object]]:
+    """
+    Returns (answer_text, plotly_fig or None)
+    version: identifies the contents of df (e.g. data version + selected range).
+    With a version and a cache, answers are memoized on (version, intent, resolved
+    period, top-N, budgets, income), so rephrased questions with the same meaning
+    are answered from the cache.
+    """
+    if df.empty:
+        return "No data available. Please upload a CSV first.", None
+
+    query = parse_question(question.strip())
+    start, end = _period_bounds(query.period, df, _now())
+    if version is None or cache is None:
+        return _answer(_filter_period(df, start, end), query, budgets, monthly_income, start, end)
+
+    # the rows a period selects identify it; unsorted frames fall back to the timestamps
+    bounds = date_bounds(df, start, end) or (start, end)
+    n = query.top_n if query.intent == "top" else None
+    # prorated budgets depend on the period's length in days, not only on its rows
+    months = budget_months(start, end) if query.intent == "overspend" else None
+    key = (version, query.intent, query.period, n, bounds, months, _budgets_key(budgets), float(monthly_income))
+    answer = cache.get(key)
+    if answer is None:
+        answer = _answer(_filter_period(df, start, end), query, budgets, monthly_income, start, end)
+        cache.put(key, answer)
+    return answer
@@ -0,0 +1,155 @@
+# Learned fallback categorizer
+# agents/ml_categorizer.py
+# Train offline from labeled transactions, e.g. the stored history:
+#   python -m agents.ml_categorizer --history history --out models/categorizer.npz
+#   python -m agents.ml_categorizer --csv labeled.csv --out models/categorizer.npz
+import argparse
+import json
+import os
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import ML_MODEL_PATH, ML_MIN_CONFIDENCE, ML_N_FEATURES, ML_NGRAM_RANGE
+
+# Labels the model is never trained to predict: Income is decided from amounts by
+# categorize_transactions. "Others" is learned, so genuinely uncategorizable
+# descriptions (people, payment gateways) stay "Others".
+EXCLUDED_LABELS = ("Income",)
+# Reference numbers, dates and amounts carry no category signal, and dropping
+# them collapses most UPI/POS descriptions of one merchant into one string
+_DIGITS_PATTERN = r"[0-9]+"
+
+def normalize_descriptions(descriptions: pd.Series) -> pd.Series:
+    """Lower-cased descriptions with digit runs removed; the model's input text."""
+    s = pd.Series(descriptions, dtype="string[pyarrow]").fillna("")
+    return s.str.lower().str.replace(_DIGITS_PATTERN, "", regex=True).str.strip()
+
+def _vectorizer(n_features: int = ML_N_FEATURES, ngram_range: Tuple[int, int] = ML_NGRAM_RANGE):
+    # stateless hashing: there is no vocabulary to fit, store or keep in memory
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(analyzer="char_wb", ngram_range=tuple(ngram_range), n_features=n_features,
+                             alternate_sign=False, lowercase=False, dtype=np.float32)
+
+class CategoryModel:
+    """Linear model over hashed character n-grams: scores = X @ coef.T + intercept."""
+
+    def __init__(self, classes: Sequence[str], coef: np.ndarray, intercept: np.ndarray,
+                 n_features: int = ML_N_FEATURES, ngram_range: Tuple[int, int] = ML_NGRAM_RANGE):
+        self.classes = np.asarray(classes, dtype=object)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float32)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.n_features, self.ngram_range = int(n_features), tuple(int(n) for n in ngram_range)
+        self._vec = _vectorizer(self.n_features, self.ngram_range)
+
+    def predict_text(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(label, probability) per normalized text; one sparse product for the whole batch."""
+        if len(texts) == 0:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float32)
+        X = self._vec.transform(texts)                  # CSR, rows x n_features
+        scores = np.asarray(X @ self.coef.T) + self.intercept
+        scores -= scores.max(axis=1, keepdims=True)
+        probs = np.exp(scores)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return self.classes[best], probs[np.arange(len(best)), best]
+
+    def predict(self, descriptions: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """(label, probability) per description; each distinct normalized text is scored once."""
+        codes, uniques = pd.factorize(normalize_descriptions(descriptions))
+        labels, conf = self.predict_text(np.asarray(uniques, dtype=object))
+        return (pd.Series(labels[codes], index=descriptions.index, dtype=object),
+                pd.Series(conf[codes], index=descriptions.index))
+
+    def save(self, path: str):
+        """Write the model as a compressed .npz (no pickle) next to a JSON copy of its parameters."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, classes=self.classes.astype(str), coef=self.coef.astype(np.float16),
+                            intercept=self.intercept,
+                            params=json.dumps({"n_features": self.n_features, "ngram_range": self.ngram_range}))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryModel":
+        with np.load(path, allow_pickle=False) as z:
+            params = json.loads(str(z["params"]))
+            return cls(z["classes"].tolist(), z["coef"], z["intercept"], **params)
+
+def train(descriptions: pd.Series, labels: pd.Series, n_features: int = ML_N_FEATURES,
+          ngram_range: Tuple[int, int] = ML_NGRAM_RANGE, seed: int = 0) -> CategoryModel:
+    """
+    Fit a multinomial logistic regression on hashed n-grams of labeled descriptions.
+    Rows labeled EXCLUDED_LABELS are skipped; duplicates of a (text, label) pair
+    are fitted once, weighted by their count.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    labels = pd.Series(labels, index=descriptions.index).astype(str)
+    keep = ~labels.isin(EXCLUDED_LABELS)
+    pairs = pd.DataFrame({"text": normalize_descriptions(descriptions[keep]).astype(object),
+                          "label": labels[keep].to_numpy()})
+    counts = pairs.groupby(["text", "label"], sort=True).size().reset_index(name="n")
+    if counts["label"].nunique() < 2:
+        raise ValueError("Need labeled rows from at least two categories to train.")
+    X = _vectorizer(n_features, ngram_range).transform(counts["text"])
+    clf = SGDClassifier(loss="log_loss", alpha=1e-6, max_iter=50, tol=1e-4, random_state=seed)
+    clf.fit(X, counts["label"], sample_weight=np.sqrt(counts["n"].to_numpy(dtype=float)))
+    coef, intercept = clf.coef_, clf.intercept_
+    if len(clf.classes_) == 2:  # binary SGD keeps one row; expand to one per class
+        coef, intercept = np.vstack([np.zeros_like(coef), coef]), np.concatenate([[0.0], intercept])
+    return CategoryModel(clf.classes_, coef, intercept, n_features, ngram_range)
+
+@lru_cache(maxsize=2)
+def _load(path: str, mtime_ns: int) -> CategoryModel:
+    return CategoryModel.load(path)
+
+def load_model(path: str = ML_MODEL_PATH) -> Optional[CategoryModel]:
+    """The trained model at `path`, loaded once per process and file version; None if absent."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _load(path, st.st_mtime_ns)
+
+def model_version(path: str = ML_MODEL_PATH) -> str:
+    """Changes whenever the model file does; part of the parse cache's processing version."""
+    try:
+        return str(os.stat(path).st_mtime_ns)
+    except OSError:
+        return "none"
+
+def refine_others(descriptions: pd.Series, model: Optional[CategoryModel] = None,
+                  min_confidence: float = ML_MIN_CONFIDENCE) -> pd.Series:
+    """
+    Labels for descriptions no rule matched: the model's prediction where its
+    probability reaches min_confidence, "Others" elsewhere (or everywhere when
+    no model is available).
+    """
+    model = model or load_model()
+    out = pd.Series("Others", index=descriptions.index, dtype=object)
+    if model is None or descriptions.empty:
+        return out
+    labels, conf = model.predict(descriptions)
+    sure = (conf >= min_confidence).to_numpy() & (labels != "Others").to_numpy()
+    out[sure] = labels[sure]
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Train the fallback categorizer from labeled transactions.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--history", help="history directory (categories as stored)")
+    src.add_argument("--csv", help="CSV with description and category columns")
+    ap.add_argument("--out", default=ML_MODEL_PATH)
+    args = ap.parse_args()
+    if args.history:
+        from utils.history import load_history
+        data = load_history(root=args.history)
+    else:
+        data = pd.read_csv(args.csv, usecols=["description", "category"], dtype=str)
+    model = train(data["description"].astype(str), data["category"])
+    model.save(args.out)
+    print(f"{args.out}: {len(model.classes)} categories, {os.path.getsize(args.out) / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ def summarize_period(df: pd.DataFrame, title: str = "Summary") -> str:
         return f"{title}: No transactions in the selected period."
 
     total_exp = df["amount"].sum()
-    by_cat = df.groupby("category")["amount"].sum().sort_values(ascending=False)
+    by_cat = df.groupby("category", observed=True)["amount"].sum().sort_values(ascending=False)
     top_line = f"{title}: Total spend ₹{total_exp:,.0f}."
 
     bullets = []
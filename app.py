@@ -1,48 +1,114 @@
 import streamlit as st
 import pandas as pd
-from config.settings import APP_NAME, DEFAULT_BUDGETS, TIMEZONE
-from utils.preprocess import load_and_clean
-from utils.file_handler import save_uploaded_file, load_file
-from agents.categorizer import categorize_transactions
+from collections import OrderedDict
+from config.settings import APP_NAME, DEFAULT_BUDGETS, TIMEZONE, BASE_CURRENCY, USD_TO_INR_RATE, HISTORY_ENABLED
+from utils.preprocess import compact_transactions
+from utils.manual_entries import ManualEntries
+import utils.ingest_jobs as ingest_jobs
+from utils.ingest import account_names
+from utils.history import append_transactions, load_history
+import utils.instrument as instrument
+from utils.parse_cache import cache_key, processing_version
+from utils.currency_converter import rates_version, conversion_issues
+from agents.categorizer import CATEGORY_RULES
+from agents.ml_categorizer import model_version
+from utils.cube import build_cube, slice_cube
+from utils.daterange import sort_by_date, slice_by_date, insert_sorted
 from dashboards.charts import make_core_charts
 from dashboards.reports import make_report
-from agents.chatbot import answer_question
+from agents.advisor import overspend_matrix
+from utils.merchants import merchant_totals
+from agents.chatbot import answer_question, AnswerCache
 
 st.set_page_config(page_title=APP_NAME, page_icon="💰", layout="wide")
 
+if instrument.enabled():
+    instrument.new_run()  # stage timings of this rerun, shown in the sidebar debug panel
+
+PROCESSING_VERSION = processing_version(CATEGORY_RULES, TIMEZONE, BASE_CURRENCY, USD_TO_INR_RATE, rates_version(),
+                                        model_version())
+
 # --- State ---
 if "df" not in st.session_state:
-    st.session_state.df = pd.DataFrame()
+    st.session_state.df = load_history() if HISTORY_ENABLED else pd.DataFrame()
 if "budgets" not in st.session_state:
     st.session_state.budgets = DEFAULT_BUDGETS.copy()
-if "manual_data" not in st.session_state:
-    st.session_state.manual_data = []
+if "manual" not in st.session_state:
+    st.session_state.manual = ManualEntries()
+if "data_version" not in st.session_state:
+    st.session_state.data_version = 0  # bumped whenever uploaded or manual data changes
 
 # --- Sidebar ---
 st.sidebar.title("⚙️ Controls")
 
-# File upload
-uploaded = st.sidebar.file_uploader("Upload transactions CSV", type=["csv"])
-if uploaded:
-    path = save_uploaded_file(uploaded)
-    try:
-        df = load_file(path)  # Use our CSV loader
-        df = load_and_clean(df)
-        df = categorize_transactions(df)
-
-        # Ensure timezone-aware
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        if df["date"].dt.tz is None:
-            df["date"] = df["date"].dt.tz_localize(
-                TIMEZONE, nonexistent="shift_forward", ambiguous="NaT"
-            )
-        else:
-            df["date"] = df["date"].dt.tz_convert(TIMEZONE)
-
-        st.session_state.df = df
-        st.sidebar.success("File processed successfully!")
-    except Exception as e:
-        st.sidebar.error(f"Failed to process CSV: {e}")
+# File upload (one CSV per account/card)
+uploads = st.sidebar.file_uploader(
+    "Upload transactions CSVs", type=["csv"], accept_multiple_files=True
+)
+if uploads:
+    # Uploads are ingested by a background job; the dashboards below keep showing
+    # the current dataset until the job publishes its result
+    # one account per upload, even when two banks' exports share a file name
+    accounts = account_names([u.name for u in uploads])
+    # contents are hashed once per upload, not on every rerun (widget interaction)
+    known = st.session_state.get("upload_keys", {})
+    hashed = {(u.file_id, u.size): known.get((u.file_id, u.size)) or cache_key(u.getbuffer(), PROCESSING_VERSION)
+              for u in uploads}
+    st.session_state.upload_keys = hashed  # only the current uploads
+    keys = {a: hashed[(u.file_id, u.size)] for a, u in zip(accounts, uploads)}
+    batch = frozenset(keys.items())
+    if batch != st.session_state.get("upload_batch"):
+        job = ingest_jobs.get_job(ingest_jobs.job_id(batch))
+        if job is None or not job.running:
+            # the job outlives this run (and the upload buffers), so it gets its own copy
+            job = ingest_jobs.submit({a: bytes(u.getbuffer()) for a, u in zip(accounts, uploads)}, keys)
+        # duplicate submissions (reruns, widget changes) attach to the same job
+        st.session_state.ingest_job = job.id
+        st.session_state.ingest_batch = batch
+
+# Publish a finished job's dataset in one step
+job = ingest_jobs.get_job(st.session_state.get("ingest_job"))
+if job is not None and not job.running and st.session_state.get("ingest_applied") != job.id:
+    status = job.status()
+    result = job.take_result() if job.state == "done" else None
+    if job.state == "done" and result is None:
+        # released after other sessions took and dropped it; resubmit the uploads
+        st.session_state.ingest_job = st.session_state.upload_batch = None
+        st.rerun()
+    if result is not None:
+        st.session_state.df = result
+        if HISTORY_ENABLED:
+            # history now holds these uploads and the session's manual entries
+            st.session_state.manual = ManualEntries()
+        st.session_state.data_version += 1
+    # a failed batch is not retried until the uploads change
+    st.session_state.upload_batch = st.session_state.ingest_batch
+    st.session_state.ingest_applied = job.id
+    st.session_state.ingest_status = status
+
+if job is not None and job.running:
+    @st.fragment(run_every=0.5)
+    def ingest_progress(job_id: str):
+        status = ingest_jobs.get_job(job_id).status()
+        if status["state"] not in ("queued", "running"):
+            st.rerun()  # whole app: publish the result
+        done = status["files_done"] / max(status["files_total"], 1)
+        st.progress(done, text=f"{status['stage'].capitalize()}: {status['files_done']}/{status['files_total']} "
+                                f"file(s), {status['rows']:,} rows ({status['seconds']:.0f}s)")
+
+    with st.sidebar:
+        ingest_progress(job.id)
+elif uploads and st.session_state.get("ingest_status"):
+    status = st.session_state.ingest_status
+    for name, err in status["errors"].items():
+        st.sidebar.error(f"Failed to process {name}: {err}")
+    if status["state"] == "done":
+        if status["added"] is not None:
+            st.sidebar.caption(f"{status['added']:,} new transactions saved to history.")
+        processed = status["files_total"] - len(status["errors"])
+        st.sidebar.success(f"{processed} file(s) processed successfully!")
+    elif not status["errors"]:
+        st.sidebar.error(f"Upload failed: {status['stage']}")
 
 # Manual entry form
 st.sidebar.markdown("---")
@@ -55,13 +121,11 @@ with st.sidebar.form("manual_entry_form", clear_on_submit=True):
     submitted = st.form_submit_button("Add")
 
 if submitted:
-    st.session_state.manual_data.append({
-        "date": pd.Timestamp(date).tz_localize(TIMEZONE),
-        "description": description,
-        "category": category,
-        "amount": amount,
-        "currency": "INR",
-    })
+    manual = st.session_state.manual
+    manual.append(pd.Timestamp(date).tz_localize(TIMEZONE), description, category, amount)
+    if HISTORY_ENABLED:
+        append_transactions(manual.frame(len(manual) - 1), dedup=False)  # entered on purpose, never a duplicate
+    st.session_state.data_version += 1
     st.sidebar.success("Transaction added!")
 
 # Budgets
@@ -82,68 +146,70 @@ monthly_income = st.sidebar.number_input(
 # --- Main Content ---
 st.title("💰 Personal Finance AI Dashboard")
 
-# Merge data (CSV + manual)
-df_csv = st.session_state.df.copy()
-df_manual = pd.DataFrame(st.session_state.manual_data)
-
-# Drop duplicate columns if any
-df_csv = df_csv.loc[:, ~df_csv.columns.duplicated()]
-df_manual = df_manual.loc[:, ~df_manual.columns.duplicated()]
-
-# Ensure schema consistency
-required_cols = ["date", "description", "category", "amount", "currency"]
-for col in required_cols:
-    if col not in df_csv.columns:
-        df_csv[col] = None
-    if col not in df_manual.columns:
-        df_manual[col] = None
-
-# Concatenate safely
-df = pd.concat([df_csv[required_cols], df_manual[required_cols]], ignore_index=True)
-
-# Ensure 'date' is datetime with timezone
-df["date"] = pd.to_datetime(df["date"], errors="coerce")
-if df["date"].notna().any():
-    if df["date"].dt.tz is None:
-        df["date"] = df["date"].dt.tz_localize(
-            TIMEZONE, nonexistent="shift_forward", ambiguous="NaT"
-        )
-    else:
-        df["date"] = df["date"].dt.tz_convert(TIMEZONE)
-
-
-
-# Ensure numeric amounts
-df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+# Merge data (CSV + manual), only when it changed since the last rerun. The
+# working set is kept date-sorted so period selection is a binary search; new
+# manual entries are inserted into it rather than rebuilding it.
+if st.session_state.get("working_version") != st.session_state.data_version:
+    with instrument.stage("merge") as s:
+        manual = st.session_state.manual
+        if st.session_state.get("working_base") is not st.session_state.df or \
+                st.session_state.get("working_manual") is not manual:
+            # new uploads: compact dtypes, tz-aware dates, sorted and indexed
+            working, merged = sort_by_date(compact_transactions(st.session_state.df)), 0
+        else:
+            working, merged = st.session_state.working, st.session_state.working_manual_rows
+        st.session_state.working = insert_sorted(working, manual.frame(merged)) if len(manual) > merged else working
+        st.session_state.working_base = st.session_state.df
+        st.session_state.working_manual = manual
+        st.session_state.working_manual_rows = len(manual)
+        st.session_state.working_version = st.session_state.data_version
+        s.rows = len(st.session_state.working)
+    # foreign amounts not converted at a current rate (no table, unknown currency, stale rates)
+    st.session_state.fx_issues = conversion_issues(st.session_state.working)
+df = st.session_state.working
 
 if df.empty:
     st.info("Upload a CSV or add manual transactions to get started.")
     st.stop()
+for issue in st.session_state.fx_issues:
+    st.sidebar.warning(issue)
 
 # --- Period filter ---
 col1, col2 = st.columns(2)
 with col1:
     start = st.date_input(
-        "Start date", value=pd.to_datetime(df["date"].min()).date()
+        "Start date", value=df["date"].iloc[0].date()
     )
 with col2:
     end = st.date_input(
-        "End date", value=pd.to_datetime(df["date"].max()).date()
+        "End date", value=df["date"].iloc[-1].date()
     )
 
 start_ts = pd.Timestamp(start).tz_localize(TIMEZONE)
 end_ts = pd.Timestamp(end).tz_localize(TIMEZONE) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+# budgets are prorated only where the range cuts into the data; data that just
+# starts or ends mid-month is held to the whole month's budget
+budget_start = start_ts if start > df["date"].iloc[0].date() else None
+budget_end = end_ts if end < df["date"].iloc[-1].date() else None
 
-mask = (df["date"] >= start_ts) & (df["date"] <= end_ts)
-view = df.loc[mask].copy()
+with instrument.stage("filter", rows=len(df)):
+    view = slice_by_date(df, start_ts, end_ts)
 
 if view.empty:
     st.warning("No transactions in this date range.")
     st.stop()
 
+# Day x category aggregates, rebuilt only when the data changes; summaries,
+# charts and the chatbot read the period's slice instead of raw transactions
+if st.session_state.get("cube_version") != st.session_state.data_version:
+    st.session_state.cube = build_cube(df)
+    st.session_state.cube_version = st.session_state.data_version
+with instrument.stage("filter_cube", rows=len(st.session_state.cube)):
+    view_cube = slice_cube(st.session_state.cube, start_ts, end_ts)
+
 # --- KPIs ---
 k1, k2 = st.columns(2)
-total_spent = view["amount"].sum()
+total_spent = view_cube["amount"].sum()
 # days = (end_ts - start_ts).days + 1
 remaining = monthly_income - total_spent
 
@@ -155,7 +221,11 @@ with k2:
     st.metric("Remaining Balance", f"₹{remaining:,.0f}")
 
 # --- Charts ---
-charts = make_core_charts(view)
+# figures are rebuilt only when the data or the selected period changes
+if "chart_cache" not in st.session_state:
+    st.session_state.chart_cache = OrderedDict()
+charts = make_core_charts(view_cube, key=(st.session_state.data_version, start_ts, end_ts),
+                          cache=st.session_state.chart_cache)
 c1, c2 = st.columns([1, 1])
 with c1:
     if charts.get("pie"):
@@ -168,14 +238,37 @@ with c2:
 
 # --- Report ---
 st.markdown("### 📜 AI Report")
-st.text(make_report(view, title="Selected Period", budgets=st.session_state.budgets))
+st.text(make_report(view_cube, title="Selected Period", budgets=st.session_state.budgets,
+                    start=budget_start, end=budget_end))
+
+with st.expander("📅 Budget adherence by month"):
+    # % over (+) or under (-) each monthly budget, months cut by the range prorated
+    adherence = overspend_matrix(view_cube, st.session_state.budgets, budget_start, budget_end)
+    if adherence.empty:
+        st.caption("No spending in the selected period.")
+    else:
+        adherence.index = adherence.index.strftime("%Y-%m")
+        st.dataframe(adherence.round(0), use_container_width=True)
+
+with st.expander("🏪 Top merchants"):
+    # narrations without reference numbers, UPI handles and dates, grouped per merchant
+    merchants = merchant_totals(view, top_n=15)
+    if merchants.empty:
+        st.caption("No spending in the selected period.")
+    else:
+        st.dataframe(merchants.round(2), use_container_width=True, hide_index=True)
 
 # --- Chatbot ---
 st.markdown("---")
 st.subheader("🤖 Data Q&A Chatbot")
 q = st.text_input("Ask about your data (e.g., 'Where did I overspend last week?' or 'Top 3 categories this month')")
+if "answer_cache" not in st.session_state:
+    st.session_state.answer_cache = AnswerCache()
 if st.button("Ask") and q.strip():
-    ans, fig = answer_question(view, q, st.session_state.budgets, monthly_income)
+    # repeated (or reworded) questions on unchanged data are answered from the cache
+    ans, fig = answer_question(view_cube, q, st.session_state.budgets, monthly_income,
+                               version=(st.session_state.data_version, start_ts, end_ts),
+                               cache=st.session_state.answer_cache)
     st.write(ans)
     if fig:
         st.plotly_chart(fig, use_container_width=True)
@@ -184,8 +277,10 @@ if st.button("Ask") and q.strip():
 st.markdown("---")
 st.subheader("📄 Processed Transactions")
 st.dataframe(
-    view[["date", "description", "category", "amount", "currency"]],
+    view[["date", "description", "merchant", "category", "amount", "currency", "original_amount", "original_currency",
+          "account"]],
     use_container_width=True,
+    hide_index=True,
 )
 
 @st.cache_data
@@ -198,3 +293,22 @@ st.download_button(
     file_name="processed_transactions.csv",
     mime="text/csv",
 )
+
+# --- Debug panel (only with instrumentation enabled, e.g. FINANCE_INSTRUMENT=1) ---
+if instrument.enabled():
+    with st.sidebar.expander("🛠 Stage timings (this rerun)"):
+        recs = instrument.records()
+        if recs:
+            timings = pd.DataFrame(recs)[["stage", "seconds", "rows", "peak_bytes"]]
+            timings["ms"] = (timings.pop("seconds") * 1000).round(1)
+            st.dataframe(timings, use_container_width=True, hide_index=True)
+        events = instrument.counts()
+        if events:
+            st.caption("Events: " + ", ".join(f"{k} {v:,}" for k, v in sorted(events.items())))
+        answers = st.session_state.answer_cache.stats()
+        st.caption(f"Answer cache (session): {answers['hits']:,} hits, {answers['misses']:,} misses, "
+                   f"{answers['entries']:,} entries")
+        st.download_button("Timings (JSON)", instrument.to_json(recs), file_name="stage_timings.json",
+                           mime="application/json")
+        st.download_button("Totals (Prometheus)", instrument.to_prometheus(), file_name="stage_timings.prom",
+                           mime="text/plain")
@@ -0,0 +1,69 @@
+# Amount parser benchmark
+# benchmarks/bench_amounts.py
+# Run from the repo root: python -m benchmarks.bench_amounts --rows 1000000
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.preprocess import _parse_amount_column, _strip_currency_and_parse
+
+FORMATS = [
+    "{:.2f}", "₹{:,.2f}", "${:.2f}", "INR {:.2f}", "{:.2f} Dr", "{:.2f} Cr", "({:,.2f})",
+    "Rs. {:,.2f}", "USD {:.0f}", "-{:.2f}",
+]
+
+def indian_grouping(value: float) -> str:
+    whole, frac = f"{value:.2f}".split(".")
+    head, tail = whole[:-3], whole[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups + [tail]) + "." + frac
+
+def synthetic_amounts(rows: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.lognormal(7, 1.5, size=rows), 2)
+    fmt = rng.integers(0, len(FORMATS) + 1, size=rows)
+    out = [indian_grouping(v) if f == len(FORMATS) else FORMATS[f].format(v) for v, f in zip(values, fmt)]
+    junk = rng.random(rows) < 0.01
+    out = np.array(out, dtype=object)
+    out[junk] = rng.choice(["", "-", "n/a", None, "1.2.3"], size=int(junk.sum()))
+    return pd.Series(out, dtype=object)
+
+def scalar_parse(s: pd.Series):
+    nums, currs = zip(*s.map(_strip_currency_and_parse))
+    return pd.Series(nums, index=s.index, dtype=float), pd.Series(currs, index=s.index, dtype=object)
+
+def _timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    s = synthetic_amounts(args.rows)
+    exp_vals, exp_curr = scalar_parse(s)
+    vals, curr = _parse_amount_column(s)
+    if not (exp_vals.equals(vals) and exp_curr.equals(curr)):
+        bad = ~((exp_vals == vals) | (exp_vals.isna() & vals.isna())) | (exp_curr.fillna("") != curr.fillna(""))
+        raise SystemExit(f"vectorized parser disagrees on {int(bad.sum())} rows, e.g. {s[bad].head().tolist()}")
+
+    t_scalar = _timeit(lambda: scalar_parse(s), args.repeat)
+    t_vec = _timeit(lambda: _parse_amount_column(s), args.repeat)
+    print(f"rows={args.rows:,}")
+    print(f"scalar map:  {t_scalar:.3f}s ({args.rows / t_scalar:,.0f} rows/s)")
+    print(f"vectorized:  {t_vec:.3f}s ({args.rows / t_vec:,.0f} rows/s)")
+    print(f"speedup:     {t_scalar / t_vec:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Categorizer benchmark
+# benchmarks/bench_categorizer.py
+# Run from the repo root: python -m benchmarks.bench_categorizer --rows 200000
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from agents.categorizer import CATEGORY_RULES, _classify_desc, classify_descriptions, categorize_transactions
+
+NOISE = ["UPI", "POS", "NEFT", "IMPS", "ref", "bangalore", "mumbai", "txn", "payment", "misc"]
+
+# Narrations where a keyword is glued to digits, split by separators, or spans
+# words merchant extraction removes; rules must still see the full narration
+ADVERSARIAL = [
+    "SWIGGY1234", "mcd123", "Amazon2024 order", "UPI/123/IRCTC12/okaxis", "AIR1234 ticket",
+    "security-deposit paid", "security deposit paid", "UPI TO 9876543210@ybl", "to self 12/08/2025",
+    "POS 4111XXXX1111 NETFLIX.COM", "neft-rent-aug", "booking.com/98765", "PAYTM WALLET 55 topup",
+    "12Aug2025 zomato", "ref#uber99", "co-working space", "in store", "1234567890", "", "  ",
+]
+
+def synthetic_descriptions(rows: int, refs: int = 5000, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    keywords = [k for ks in CATEGORY_RULES.values() for k in ks] + ["unknown vendor"]
+    kw = rng.choice(keywords, size=rows)
+    noise = rng.choice(NOISE, size=rows)
+    ref = rng.integers(0, refs, size=rows)
+    return pd.Series([f"{n}/{r}/{k.upper()}" for n, r, k in zip(noise, ref, kw)], dtype=object)
+
+def _timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--refs", type=int, default=5000, help="distinct reference numbers (controls duplication)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    desc = synthetic_descriptions(args.rows, refs=args.refs)
+    expected = desc.map(_classify_desc)
+    got = classify_descriptions(desc)
+    if not expected.equals(got):
+        raise SystemExit("classify_descriptions disagrees with _classify_desc")
+    # the full pipeline (merchant extraction included) on the tricky narrations too
+    tricky = pd.concat([pd.Series(ADVERSARIAL, dtype=object), desc.head(10_000)], ignore_index=True)
+    frame = pd.DataFrame({"description": tricky, "expense": 1.0, "income": 0.0})
+    labels = categorize_transactions(frame, fallback=False)["category"]
+    bad = labels != tricky.map(_classify_desc)
+    if bad.any():
+        raise SystemExit(f"categorize_transactions disagrees with _classify_desc on {tricky[bad].head().tolist()}")
+
+    t_row = _timeit(lambda: desc.map(_classify_desc), args.repeat)
+    t_batch = _timeit(lambda: classify_descriptions(desc), args.repeat)
+    print(f"rows={args.rows:,} unique={desc.nunique():,}")
+    print(f"per-row map:  {t_row:.3f}s ({args.rows / t_row:,.0f} rows/s)")
+    print(f"batched:      {t_batch:.3f}s ({args.rows / t_batch:,.0f} rows/s)")
+    print(f"speedup:      {t_row / t_batch:.1f}x")
+
+if __name__ == "__main__":
+    main()
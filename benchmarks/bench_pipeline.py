@@ -0,0 +1,128 @@
+# End-to-end pipeline benchmark (ingest -> dashboard)
+# benchmarks/bench_pipeline.py
+# Run from the repo root: python -m benchmarks.bench_pipeline --rows 10000 100000 1000000
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import pandas as pd
+from config.settings import DEFAULT_BUDGETS
+from utils.file_handler import load_file
+from utils.preprocess import (load_and_clean, compact_transactions, read_statement, DATE_CANDIDATES,
+                              DESC_CANDIDATES, AMOUNT_CANDIDATES)
+from utils.cube import build_cube
+from utils.daterange import sort_by_date
+from agents.categorizer import categorize_transactions
+from dashboards.charts import make_core_charts
+from dashboards.reports import make_report
+from agents.chatbot import answer_question
+from benchmarks.synthetic import write_statement
+
+QUESTIONS = [
+    "How much did I spend this month?",
+    "What is my top category last month?",
+    "Show top 5 categories this year",
+    "Am I over budget?",
+]
+
+def _measure(fn, memory: bool):
+    """Run fn once; return (result, seconds, peak MB allocated during the call or None)."""
+    if memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 2**20 if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_pipeline(path: str, memory: bool = True, legacy: bool = False) -> list:
+    """
+    Time (and optionally memory-profile) each stage on one statement file, in app order.
+    legacy=True ingests with the old two passes (load_file, then load_and_clean);
+    that loader only keeps lower-cased date/description/amount columns, so it
+    must see "Date", "Description" and "Amount" headers (see main).
+    """
+    stages = []
+
+    def stage(name, fn, rows_in):
+        result, seconds, peak = _measure(fn, memory)
+        rows_out = len(result) if isinstance(result, pd.DataFrame) else None
+        stages.append({"stage": name, "seconds": round(seconds, 6), "peak_mb": None if peak is None else round(peak, 3),
+                       "rows_in": rows_in, "rows_out": rows_out})
+        return result
+
+    if legacy:
+        raw = stage("load_file", lambda: load_file(path), None)
+        clean = stage("load_and_clean", lambda: load_and_clean(raw), len(raw))
+        if clean.empty and len(raw):
+            raise SystemExit(f"legacy ingest kept 0 of {len(raw):,} rows of {path}; the baseline is meaningless")
+    else:
+        clean = stage("read_statement", lambda: read_statement(path), None)
+    df = stage("categorize_transactions", lambda: categorize_transactions(clean), len(clean))
+    df = stage("compact_and_sort", lambda: sort_by_date(compact_transactions(df)), len(df))
+    cube = stage("build_cube", lambda: build_cube(df), len(df))
+    stage("make_core_charts", lambda: dict(make_core_charts(cube)), len(cube))  # figures are lazy
+    stage("make_report", lambda: make_report(cube, "Benchmark", DEFAULT_BUDGETS), len(cube))
+    stage("answer_question", lambda: [answer_question(cube, q, DEFAULT_BUDGETS, 0.0) for q in QUESTIONS], len(cube))
+    return stages
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--layout", choices=["amount", "debit_credit"], default="amount")
+    ap.add_argument("--variant", type=int, default=0, help="column-name variant (see benchmarks.synthetic)")
+    ap.add_argument("--currency-mix", type=float, default=0.05)
+    ap.add_argument("--legacy", action="store_true", help="two-pass ingest (load_file + load_and_clean)")
+    ap.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows every stage)")
+    ap.add_argument("--out", default="benchmarks/results.jsonl", help="JSON lines file results are appended to")
+    args = ap.parse_args()
+    headers = [c[args.variant % len(c)] for c in (DATE_CANDIDATES, DESC_CANDIDATES, AMOUNT_CANDIDATES)]
+    if args.legacy and (args.layout != "amount" or headers != ["Date", "Description", "Amount"]):
+        ap.error("--legacy needs --layout amount and a variant with Date/Description/Amount headers "
+                 f"(variant {args.variant} writes {'/'.join(headers)})")
+
+    meta = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "layout": args.layout,
+        "variant": args.variant,
+        "currency_mix": args.currency_mix,
+        "ingest": "legacy" if args.legacy else "read_statement",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # first calls pay one-off costs (plotly templates, regex compilation); keep them out of the numbers
+        run_pipeline(write_statement(os.path.join(tmp, "warmup.csv"), 1000, layout=args.layout,
+                                     variant=args.variant), memory=False, legacy=args.legacy)
+        for rows in args.rows:
+            path = write_statement(os.path.join(tmp, f"statement_{rows}.csv"), rows, layout=args.layout,
+                                   variant=args.variant, currency_mix=args.currency_mix)
+            record = dict(meta, rows=rows, file_mb=round(os.path.getsize(path) / 2**20, 3),
+                          stages=run_pipeline(path, memory=not args.no_memory, legacy=args.legacy))
+            with open(args.out, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            print(f"rows={rows:,}")
+            for s in record["stages"]:
+                mem = "" if s["peak_mb"] is None else f"  peak {s['peak_mb']:>9.1f} MB"
+                print(f"  {s['stage']:<24} {s['seconds']:>9.3f}s{mem}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Cold import time of the core modules
+# benchmarks/bench_startup.py
+# Run from the repo root: python -m benchmarks.bench_startup --repeat 5
+# Every import runs in a fresh interpreter (nothing cached in sys.modules);
+# -X importtime attributes the time to the modules pulled in.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# the ingest path on its own first, then what the UI and the headless reports add
+TARGETS = [
+    "utils.preprocess",
+    "utils.ingest",
+    "agents.chatbot",
+    "dashboards.charts",
+    "dashboards.batch_reports",
+]
+# optional heavy dependencies that only specific features should load
+HEAVY = ("plotly", "streamlit", "sklearn", "pytz", "dateutil")
+
+_CHILD = """
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t0
+print(json.dumps({{"seconds": dt, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module: str, root: str):
+    """(import seconds, heavy modules loaded, {top-level package: self microseconds}) for one cold import."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module, heavy=HEAVY)],
+                          cwd=root, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    self_us = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_part, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        self_us[package] = self_us.get(package, 0) + int(self_part)
+    return result["seconds"], result["loaded"], self_us
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=5, help="packages to list by import time")
+    ap.add_argument("modules", nargs="*", default=TARGETS)
+    args = ap.parse_args()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    for module in args.modules:
+        runs = [measure(module, root) for _ in range(args.repeat)]
+        seconds, loaded, self_us = min(runs, key=lambda r: r[0])
+        top = sorted(self_us.items(), key=lambda kv: -kv[1])[:args.top]
+        print(f"{module:<26} {seconds * 1000:7.1f} ms  heavy: {', '.join(loaded) or '-'}")
+        print(" " * 27 + "  ".join(f"{p} {us / 1000:.0f}ms" for p, us in top))
+
+if __name__ == "__main__":
+    main()
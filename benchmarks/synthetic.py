@@ -0,0 +1,106 @@
+# Synthetic bank statement generator
+# benchmarks/synthetic.py
+# python -m benchmarks.synthetic --rows 100000 --out /tmp/statement.csv
+import argparse
+import numpy as np
+import pandas as pd
+from utils.preprocess import DATE_CANDIDATES, DESC_CANDIDATES, AMOUNT_CANDIDATES, DEBIT_CANDIDATES, CREDIT_CANDIDATES
+
+MERCHANTS = {
+    "Food": ["SWIGGY", "ZOMATO", "DOMINOS PIZZA", "KFC", "CAFE COFFEE DAY", "EATFIT"],
+    "Transport": ["UBER INDIA", "OLA CABS", "RAPIDO", "INDIAN OIL PETROL", "DELHI METRO"],
+    "Shopping": ["AMAZON PAY", "FLIPKART", "MYNTRA", "AJIO", "DECATHLON STORE"],
+    "Housing": ["RENT JUNE", "SOCIETY MAINTENANCE", "LANDLORD"],
+    "Utilities": ["BESCOM ELECTRICITY", "AIRTEL BROADBAND", "JIO RECHARGE", "TATA PLAY DTH"],
+    "Entertainment": ["NETFLIX", "SPOTIFY", "BOOKMYSHOW", "PVR MOVIE"],
+    "Health": ["APOLLO PHARMACY", "MEDPLUS MEDICINE", "THYROCARE LAB"],
+    "Travel": ["INDIGO", "IRCTC", "MAKEMYTRIP", "OYO ROOMS"],
+    "Groceries": ["BIGBASKET", "DMART", "JIOMART", "MILK BASKET"],
+    "Other": ["RAMESH KUMAR", "SHARMA GENERAL", "PAYU MERCHANT", "RAZORPAY"],
+}
+CITIES = ["BANGALORE", "MUMBAI", "DELHI", "PUNE", "HYDERABAD", "CHENNAI"]
+HANDLES = ["okaxis", "okhdfcbank", "ybl", "paytm", "oksbi"]
+TEMPLATES = ["UPI/{ref}/{m} {city}/{handle}", "POS {ref} {m} {city}", "{m}", "NEFT-{ref}-{m}", "IMPS/{ref}/{m}"]
+INCOME = ["SALARY ACME CORP", "INTEREST CREDIT", "REFUND AMAZON", "CASHBACK PAYTM"]
+
+def _descriptions(rng: np.random.Generator, rows: int) -> np.ndarray:
+    merchants = np.array([m for ms in MERCHANTS.values() for m in ms], dtype=object)
+    m = rng.choice(merchants, size=rows)
+    tpl = rng.integers(0, len(TEMPLATES), size=rows)
+    ref = rng.integers(10**8, 10**9, size=rows).astype(str)
+    city = rng.choice(CITIES, size=rows)
+    handle = rng.choice(HANDLES, size=rows)
+    out = np.empty(rows, dtype=object)
+    for i, t in enumerate(TEMPLATES):
+        sel = tpl == i
+        out[sel] = [t.format(ref=r, m=mm, city=c, handle=h)
+                    for r, mm, c, h in zip(ref[sel], m[sel], city[sel], handle[sel])]
+    return out
+
+def _format_amounts(rng: np.random.Generator, values: np.ndarray, currency_mix: float) -> np.ndarray:
+    """Render amounts as text: mostly plain/₹/grouped INR, a `currency_mix` share in USD."""
+    usd = rng.random(len(values)) < currency_mix
+    style = rng.integers(0, 3, size=len(values))
+    out = np.empty(len(values), dtype=object)
+    plain = pd.Series(values).map("{:.2f}".format).to_numpy(dtype=object)
+    grouped = pd.Series(values).map("{:,.2f}".format).to_numpy(dtype=object)
+    out[:] = plain
+    out[style == 1] = "₹" + grouped[style == 1]
+    out[style == 2] = grouped[style == 2]
+    out[usd] = "$" + pd.Series(values[usd] / 83.0).map("{:.2f}".format).to_numpy(dtype=object)
+    return out
+
+def generate_statement(rows: int, seed: int = 0, layout: str = "amount", variant: int = 0,
+                       currency_mix: float = 0.05, income_share: float = 0.05,
+                       start: str = "2022-01-01", end: str = "2025-06-30",
+                       date_format: str = "%d/%m/%Y") -> pd.DataFrame:
+    """
+    Bank-export-like frame with `rows` transactions.
+    layout: "amount" (one signed Amount column) or "debit_credit".
+    variant picks the header spelling from the *_CANDIDATES lists, so loaders see
+    every supported name over a range of variants.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, end, freq="D")
+    dates = np.sort(rng.choice(days.to_numpy(), size=rows))
+    desc = _descriptions(rng, rows)
+    is_income = rng.random(rows) < income_share
+    desc[is_income] = rng.choice(np.array(INCOME, dtype=object), size=int(is_income.sum()))
+    values = np.round(rng.lognormal(6.5, 1.3, size=rows), 2)
+    values[is_income] = np.round(rng.lognormal(10, 0.5, size=int(is_income.sum())), 2)
+
+    date_col = DATE_CANDIDATES[variant % len(DATE_CANDIDATES)]
+    desc_col = DESC_CANDIDATES[variant % len(DESC_CANDIDATES)]
+    df = pd.DataFrame({
+        date_col: pd.DatetimeIndex(dates).strftime(date_format),
+        desc_col: desc,
+    })
+    if layout == "debit_credit":
+        debit = _format_amounts(rng, values, currency_mix)
+        df[DEBIT_CANDIDATES[variant % len(DEBIT_CANDIDATES)]] = np.where(is_income, "", debit)
+        df[CREDIT_CANDIDATES[variant % len(CREDIT_CANDIDATES)]] = np.where(is_income, debit, "")
+    else:
+        signed = np.where(is_income, -values, values)
+        df[AMOUNT_CANDIDATES[variant % len(AMOUNT_CANDIDATES)]] = _format_amounts(rng, signed, currency_mix)
+    df["Ref No"] = rng.integers(10**11, 10**12, size=rows).astype(str)
+    return df
+
+def write_statement(path: str, rows: int, **kwargs) -> str:
+    generate_statement(rows, **kwargs).to_csv(path, index=False)
+    return path
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--layout", choices=["amount", "debit_credit"], default="amount")
+    ap.add_argument("--variant", type=int, default=0)
+    ap.add_argument("--currency-mix", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    write_statement(args.out, args.rows, seed=args.seed, layout=args.layout,
+                    variant=args.variant, currency_mix=args.currency_mix)
+    print(args.out)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # Configuration settings
-
 # config/settings.py
+import os
 
 # --- General ---
 APP_NAME = "Personal Finance AI Dashboard"
@@ -9,6 +9,8 @@ TIMEZONE = "Asia/Kolkata"
 # --- Currency ---
 BASE_CURRENCY = "INR"
 USD_TO_INR_RATE = 83.0  # fallback constant (update if you like)
+FX_RATES_PATH = "data/fx_rates.csv"  # your historical rates into BASE_CURRENCY (README); USD_TO_INR_RATE if missing
+FX_RATES_MAX_AGE_DAYS = 31       # newer transactions than the newest rate + this are flagged as stale
 
 # --- Default monthly budgets (INR) ---
 DEFAULT_BUDGETS = {
@@ -25,3 +27,50 @@ DEFAULT_BUDGETS = {
     "Subscriptions": 1500,
     "Others": 3000,
 }
+
+# --- Learned categorizer (fallback for descriptions no CATEGORY_RULES keyword matches) ---
+ML_MODEL_PATH = "models/categorizer.npz"  # used when present; see agents/ml_categorizer.py
+ML_MIN_CONFIDENCE = 0.6          # lower-probability predictions stay "Others"
+ML_N_FEATURES = 2 ** 18          # hashed character n-gram buckets
+ML_NGRAM_RANGE = (2, 4)
+
+# --- Parse cache (processed uploads, keyed by file content) ---
+PARSE_CACHE_VERSION = 4          # bump for changes outside the hashed parser modules (parse_cache.PARSER_MODULES)
+PARSE_CACHE_DIR = ".cache/parsed"
+PARSE_CACHE_MEMORY_ENTRIES = 8
+PARSE_CACHE_MAX_MB = 512
+
+# --- Uploaded statements (parsed in memory; raw copies kept only if enabled) ---
+UPLOAD_STORE_ENABLED = False
+UPLOAD_STORE_DIR = ".cache/uploads"   # files named by the SHA-256 of their bytes
+UPLOAD_STORE_MAX_MB = 256
+UPLOAD_STORE_RETENTION_DAYS = 30
+
+# --- Merchants (canonical names from descriptions; stable ids) ---
+MERCHANT_DICT_PATH = ".cache/merchants.json"
+MERCHANT_DICT_ENTRIES = 50_000   # least recently seen merchants are evicted beyond this
+
+# --- Multi-account ingestion ---
+TRANSFER_WINDOW_DAYS = 2         # max days between the two legs of a transfer between own accounts
+
+# --- Background ingestion ---
+# concurrent upload batches, shared by all sessions; files of a batch use a process pool
+INGEST_WORKERS = int(os.environ.get("FINANCE_INGEST_WORKERS", "4"))
+INGEST_JOBS_KEPT = 32            # finished jobs remembered for status display
+INGEST_RESULTS_KEPT = 2          # finished datasets no session has taken yet, held for late readers
+
+# --- Transaction history (monthly Parquet partitions) ---
+# One store shared by every session of the server: enable only for a single-user deployment
+HISTORY_ENABLED = os.environ.get("FINANCE_HISTORY", "") == "1"
+HISTORY_DIR = os.environ.get("FINANCE_HISTORY_DIR", "history")
+
+# --- Charts ---
+TREND_MAX_POINTS = 400           # longer trends are bucketed weekly, then monthly
+CHART_CACHE_ENTRIES = 32         # memoized figures kept per session
+
+# --- Chatbot ---
+ANSWER_CACHE_ENTRIES = 256       # memoized answers kept per session
+
+# --- Instrumentation (per-stage timings; sidebar debug panel) ---
+INSTRUMENTATION_ENABLED = os.environ.get("FINANCE_INSTRUMENT", "") == "1"
+INSTRUMENTATION_MEMORY = os.environ.get("FINANCE_INSTRUMENT_MEMORY", "") == "1"  # tracemalloc peaks (slower)
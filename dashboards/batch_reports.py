@@ -0,0 +1,163 @@
+# Headless report pipeline (cron jobs, many users)
+# dashboards/batch_reports.py
+# Run from the repo root, without Streamlit or Plotly:
+#   python -m dashboards.batch_reports statements/*.csv --format text
+#   python -m dashboards.batch_reports --users-dir exports/ --format json --out reports.json --workers 4
+# --users-dir holds one sub-directory of CSV statements per user.
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import pandas as pd
+from config.settings import DEFAULT_BUDGETS, TIMEZONE
+from utils.ingest import process_statement, merge_statements, account_names, pool_context
+from utils.cube import build_cube, slice_cube, category_totals
+from utils.merchants import merchant_totals
+from utils.currency_converter import conversion_issues
+from dashboards.reports import make_report
+from agents.advisor import overspend_report
+
+FORMATS = ("text", "json", "csv")
+
+def _bound(value, end: bool = False) -> Optional[pd.Timestamp]:
+    # dates are whole local days; an end date includes its last second
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize(TIMEZONE) if ts.tz is None else ts.tz_convert(TIMEZONE)
+    return ts + pd.Timedelta(days=1) - pd.Timedelta(seconds=1) if end else ts
+
+def user_report(user: str, files: Sequence[str], budgets: Optional[dict] = None,
+                start=None, end=None, top_merchants: int = 5) -> dict:
+    """
+    Ingest one user's statements (one file per account, labelled by file name;
+    same-named files in different directories stay separate accounts),
+    categorize them and build the text report, overspend list and per-category
+    totals for start..end (whole days; the data's own range where omitted).
+    Files that fail to parse are listed under "errors" instead of aborting.
+    """
+    budgets = DEFAULT_BUDGETS if budgets is None else budgets
+    frames, errors = {}, {}
+    for path, account in zip(files, account_names(files)):
+        try:
+            frames[account] = process_statement(path)
+        except Exception as e:
+            errors[path] = str(e)
+    df = merge_statements(frames)
+    out = {"user": user, "files": len(files), "errors": errors, "rows": len(df),
+           "warnings": conversion_issues(df)}
+    if df.empty:
+        return {**out, "start": None, "end": None, "total_spent": 0.0, "report": f"{user}: no transactions.",
+                "overspend": [], "categories": [], "top_merchants": []}
+
+    # budgets are prorated only at a given --start/--end; otherwise whole months count
+    cut_start, cut_end = _bound(start), _bound(end, end=True)
+    start = cut_start if cut_start is not None else df["date"].iloc[0].normalize()
+    end = cut_end if cut_end is not None else _bound(df["date"].iloc[-1].date(), end=True)
+    cube = slice_cube(build_cube(df), start, end)
+    totals = category_totals(cube)
+    merchants = merchant_totals(df[(df["date"] >= start) & (df["date"] <= end)], top_n=top_merchants)
+    return {
+        **out,
+        "start": start.date().isoformat(),
+        "end": end.date().isoformat(),
+        "total_spent": round(float(totals["amount"].sum()), 2),
+        "report": make_report(cube, title=user, budgets=budgets, start=cut_start, end=cut_end),
+        "overspend": [{"category": c, "actual": round(a, 2), "budget": round(b, 2), "pct_over": round(p, 1)}
+                      for c, a, b, p in overspend_report(cube, budgets, cut_start, cut_end)],
+        "categories": [{"category": str(c), "amount": round(float(a), 2)}
+                       for c, a in totals.sort_values("amount", ascending=False).itertuples(index=False)],
+        "top_merchants": [{"merchant": m, "amount": round(float(a), 2), "count": int(n)}
+                          for m, a, n in merchants[["merchant", "amount", "count"]].itertuples(index=False)],
+    }
+
+def run_reports(users: Dict[str, Sequence[str]], budgets: Optional[Dict[str, dict]] = None,
+                start=None, end=None, max_workers: Optional[int] = None) -> List[dict]:
+    """
+    user_report for every {user: [statement paths]}, in the order given. With
+    more than one worker, users are spread over a process pool (one user per
+    task); budgets are per user, DEFAULT_BUDGETS where missing.
+    """
+    budgets = budgets or {}
+    names = list(users)
+    workers = max_workers or min(len(names), os.cpu_count() or 1)
+    if workers <= 1 or len(names) <= 1:
+        return [user_report(u, users[u], budgets.get(u), start, end) for u in names]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(["dashboards.batch_reports"])) as pool:
+        futures = [pool.submit(user_report, u, users[u], budgets.get(u), start, end) for u in names]
+        return [f.result() for f in futures]
+
+def format_reports(reports: List[dict], fmt: str) -> str:
+    """Render reports as plain text, a JSON array, or CSV (one row per user and category)."""
+    if fmt == "json":
+        return json.dumps(reports, indent=2, ensure_ascii=False)
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["user", "start", "end", "category", "amount", "budget", "pct_over"])
+        for r in reports:
+            over = {o["category"]: o for o in r["overspend"]}
+            for c in r["categories"]:
+                o = over.get(c["category"], {})
+                writer.writerow([r["user"], r["start"], r["end"], c["category"], c["amount"],
+                                 o.get("budget", ""), o.get("pct_over", "")])
+        return buf.getvalue()
+    blocks = []
+    for r in reports:
+        lines = [r["report"]]
+        lines += [f"! {path}: {err}" for path, err in r["errors"].items()]
+        lines += [f"! {msg}" for msg in r["warnings"]]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+def _discover(args) -> Dict[str, List[str]]:
+    users: Dict[str, List[str]] = {}
+    if args.files:
+        users[args.user] = list(args.files)
+    if args.users_dir:
+        for name in sorted(os.listdir(args.users_dir)):
+            folder = os.path.join(args.users_dir, name)
+            if os.path.isdir(folder):
+                files = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".csv"))
+                if files:
+                    users[name] = files
+    return users
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Build finance reports from CSV statements without the UI.")
+    ap.add_argument("files", nargs="*", help="statement CSVs of one user (one file per account)")
+    ap.add_argument("--user", default="me", help="name of the user the positional files belong to")
+    ap.add_argument("--users-dir", help="directory with one sub-directory of statements per user")
+    ap.add_argument("--budgets", help="JSON file: {category: monthly budget} or {user: {category: budget}}")
+    ap.add_argument("--start", help="first day (YYYY-MM-DD); default: first transaction")
+    ap.add_argument("--end", help="last day (YYYY-MM-DD); default: last transaction")
+    ap.add_argument("--format", choices=FORMATS, default="text")
+    ap.add_argument("--out", help="output file (default: stdout)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    args = ap.parse_args(argv)
+
+    users = _discover(args)
+    if not users:
+        ap.error("no statements given (pass CSV files or --users-dir)")
+    budgets: Dict[str, dict] = {}
+    if args.budgets:
+        with open(args.budgets, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        per_user = all(isinstance(v, dict) for v in spec.values())
+        budgets = spec if per_user else {u: spec for u in users}
+
+    reports = run_reports(users, budgets, args.start, args.end, max_workers=args.workers)
+    text = format_reports(reports, args.format)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 1 if any(r["errors"] for r in reports) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
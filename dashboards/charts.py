@@ -1,11 +1,73 @@
 # Reusable chart functions
 # dashboards/charts.py
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Hashable, Optional
 import pandas as pd
+from config.settings import CHART_CACHE_ENTRIES, TREND_MAX_POINTS
 from utils.visualization import pie_by_category, trend_by_date, bar_top_categories
+from utils.cube import category_totals
+from utils.instrument import stage
 
-def make_core_charts(df: pd.DataFrame):
-    return {
-        "pie": pie_by_category(df),
-        "trend": trend_by_date(df),
-        "top": bar_top_categories(df, top_n=5),
-    }
+CHART_TYPES = ("pie", "trend", "top")
+
+class LazyCharts(Mapping):
+    """
+    The core figures for one data slice, each built on first access. With a `key`
+    (anything identifying the slice, e.g. (data version, start, end)) and a `cache`
+    OrderedDict, figures are memoized there under (key, chart type) and reused by
+    later reruns that ask for the same slice; the cache keeps the most recent
+    `max_entries` figures.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: Optional[Hashable] = None,
+                 cache: Optional[OrderedDict] = None, max_points: int = TREND_MAX_POINTS,
+                 max_entries: int = CHART_CACHE_ENTRIES):
+        self._df = df
+        self._key = key
+        self._cache = cache if (cache is not None and key is not None) else OrderedDict()
+        self._max_points = max_points
+        self._max_entries = max_entries
+        self._totals = None
+
+    def _category_totals(self) -> pd.DataFrame:
+        # shared by the pie and the bar chart
+        if self._totals is None:
+            self._totals = category_totals(self._df)
+        return self._totals
+
+    def _build(self, chart: str):
+        if chart == "pie":
+            return pie_by_category(self._category_totals())
+        if chart == "top":
+            return bar_top_categories(self._category_totals(), top_n=5)
+        return trend_by_date(self._df, max_points=self._max_points)
+
+    def __getitem__(self, chart: str):
+        if chart not in CHART_TYPES:
+            raise KeyError(chart)
+        ck = (self._key, chart)
+        if ck in self._cache:
+            self._cache.move_to_end(ck)
+            return self._cache[ck]
+        with stage(f"chart:{chart}", rows=len(self._df)):
+            fig = self._build(chart)
+        self._cache[ck] = fig
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+        return fig
+
+    def __iter__(self):
+        return iter(CHART_TYPES)
+
+    def __len__(self) -> int:
+        return len(CHART_TYPES)
+
+def make_core_charts(df: pd.DataFrame, key: Optional[Hashable] = None,
+                     cache: Optional[OrderedDict] = None) -> LazyCharts:
+    """
+    df: a cube slice from utils.cube (raw transactions also work).
+    Returns a mapping of 'pie', 'trend' and 'top' figures, built lazily and,
+    given a key and cache, memoized across calls (see LazyCharts).
+    """
+    return LazyCharts(df, key=key, cache=cache)
@@ -2,9 +2,20 @@
 # dashboards/reports.py
 import pandas as pd
 from agents.summarizer import summarize_period
-from agents.advisor import advice_text
+from agents.advisor import advice_text, budget_span
+from utils.cube import category_totals
+from utils.instrument import instrumented
 
-def make_report(df: pd.DataFrame, title: str, budgets: dict) -> str:
-    s = summarize_period(df, title=title)
-    a = advice_text(df, budgets)
+@instrumented("make_report")
+def make_report(df: pd.DataFrame, title: str, budgets: dict, start=None, end=None) -> str:
+    """
+    df: a cube slice from utils.cube (raw transactions also work).
+    start/end: where the period cuts into the data; monthly budgets are prorated
+    there and cover whole calendar months on a side left as None (budget_span).
+    """
+    totals = category_totals(df)
+    s = summarize_period(totals, title=title)
+    if not df.empty:
+        start, end = budget_span(df, start, end)  # totals no longer have dates
+    a = advice_text(totals, budgets, start=start, end=end)
     return f"{s}\n\n{a}"
@@ -1,4 +1,25 @@
 # finance_ai_dashboard/utils/__init__.py
 
-from .visualization import pie_by_category, trend_by_date, bar_top_categories
-from .file_handler import save_file, save_uploaded_file, load_file
+# Re-exports are resolved on first access (PEP 562), so importing any utils
+# submodule does not pull in Plotly via .visualization.
+_EXPORTS = {
+    "pie_by_category": ".visualization",
+    "trend_by_date": ".visualization",
+    "bar_top_categories": ".visualization",
+    "save_file": ".file_handler",
+    "save_uploaded_file": ".file_handler",
+    "load_file": ".file_handler",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
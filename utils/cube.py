@@ -0,0 +1,51 @@
+# Pre-aggregated (day, category) cube
+# utils/cube.py
+import numpy as np
+import pandas as pd
+from utils.daterange import sort_by_date, slice_by_date
+from utils.instrument import instrumented
+
+CUBE_COLUMNS = [
+    "date", "category",
+    "amount", "count", "amount_min", "amount_max",
+    "income", "income_count", "income_min", "income_max",
+]
+
+@instrumented("build_cube")
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate transactions into one row per (day, category), sorted by day.
+    'amount' is the expense sum, so a cube (or a slice of it) can be handed to
+    anything that sums 'amount' by 'category' or 'date' in place of raw rows.
+    Rows with a missing category are kept (as NaN) so totals still add up.
+    Like sort_by_date, the result is indexed by day for binary-search slicing.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+    income = df["income"] if "income" in df.columns else pd.Series(0.0, index=df.index)
+    d = pd.DataFrame({
+        "date": pd.to_datetime(df["date"], errors="coerce").dt.normalize(),
+        "category": df["category"],
+        "amount": pd.to_numeric(df["amount"], errors="coerce").fillna(0.0),
+        "income": pd.to_numeric(income, errors="coerce").fillna(0.0),
+    })
+    d["_income_row"] = np.where(d["income"] > 0, d["income"], np.nan)
+    cube = d.groupby(["date", "category"], sort=True, dropna=False, observed=True).agg(
+        amount=("amount", "sum"),
+        count=("amount", "size"),
+        amount_min=("amount", "min"),
+        amount_max=("amount", "max"),
+        income=("income", "sum"),
+        income_count=("_income_row", "count"),
+        income_min=("_income_row", "min"),
+        income_max=("_income_row", "max"),
+    ).reset_index()
+    return sort_by_date(cube)
+
+def slice_cube(cube: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Cube rows whose day falls within [start, end]."""
+    return slice_by_date(cube, start, end)
+
+def category_totals(d: pd.DataFrame) -> pd.DataFrame:
+    """Collapse a cube slice (or raw rows) to one row per category: category, amount."""
+    return d.groupby("category", as_index=False, dropna=False, observed=True)["amount"].sum()
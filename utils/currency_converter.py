@@ -1 +1,194 @@
 # Currency Converter Functions
+# utils/currency_converter.py
+import os
+import warnings
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import BASE_CURRENCY, USD_TO_INR_RATE, FX_RATES_PATH, FX_RATES_MAX_AGE_DAYS
+
+# Rate tables are long-format: one row per (date, currency) with the value of one
+# unit of `currency` in BASE_CURRENCY, effective from `date` until the next row.
+RATE_COLUMNS = ["date", "currency", "rate"]
+
+class RateTable:
+    """
+    Historical rates indexed for as-of lookups: per currency, effective days
+    (int64, days since epoch, ascending) and the rate from each day on.
+    BASE_CURRENCY always converts at 1.
+    """
+
+    def __init__(self, rates: pd.DataFrame):
+        rates = rates.dropna(subset=RATE_COLUMNS)
+        days = (pd.to_datetime(rates["date"]).dt.normalize().to_numpy(dtype="datetime64[D]")
+                .astype(np.int64))
+        order = np.lexsort((days, rates["currency"].to_numpy()))
+        self._rates: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        cur = rates["currency"].to_numpy()[order]
+        days, values = days[order], rates["rate"].to_numpy(dtype=float)[order]
+        for code in pd.unique(cur):
+            sel = cur == code
+            self._rates[str(code).upper()] = (days[sel], values[sel])
+
+    @property
+    def currencies(self):
+        return sorted(set(self._rates) | {BASE_CURRENCY})
+
+    def lookup(self, currency: str, days: np.ndarray) -> np.ndarray:
+        """
+        Rates of `currency` for local days (int64 days since epoch): the latest
+        rate on or before each day, the earliest one for days before the table
+        starts, NaN for a currency the table does not know.
+        """
+        if currency == BASE_CURRENCY:
+            return np.ones(len(days))
+        if currency not in self._rates:
+            return np.full(len(days), np.nan)
+        eff, values = self._rates[currency]
+        idx = np.searchsorted(eff, days, side="right") - 1
+        return values[np.clip(idx, 0, len(eff) - 1)]
+
+    def last_day(self, currency: str) -> Optional[int]:
+        """Effective day (days since epoch) of the newest rate for `currency`; None if unknown or base."""
+        if currency == BASE_CURRENCY or currency not in self._rates:
+            return None
+        return int(self._rates[currency][0][-1])
+
+class StaleRateWarning(UserWarning):
+    """Amounts were converted with a rate older than FX_RATES_MAX_AGE_DAYS."""
+
+def _fallback_rates() -> pd.DataFrame:
+    # without a rate table, USD converts at the constant from settings (the old behaviour)
+    return pd.DataFrame({"date": [pd.Timestamp("1970-01-01")], "currency": ["USD"], "rate": [USD_TO_INR_RATE]})
+
+def read_rates(path: str) -> pd.DataFrame:
+    """A rate table from CSV (lines starting with # are comments) or Parquet, in RATE_COLUMNS form."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, comment="#")
+    missing = [c for c in RATE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Rate table {path} lacks column(s) {missing}; expected {RATE_COLUMNS}.")
+    df = df[RATE_COLUMNS].copy()
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    df["currency"] = df["currency"].astype(str).str.strip().str.upper()
+    df["rate"] = pd.to_numeric(df["rate"], errors="coerce")
+    return df
+
+@lru_cache(maxsize=4)
+def _load(path: str, mtime: float, size: int) -> RateTable:
+    return RateTable(read_rates(path))
+
+def load_rates(path: str = FX_RATES_PATH) -> RateTable:
+    """The rate table at `path`, parsed once per file version (modification time and size)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _fallback_table()
+    return _load(path, st.st_mtime, st.st_size)
+
+@lru_cache(maxsize=1)
+def _fallback_table() -> RateTable:
+    return RateTable(_fallback_rates())
+
+def rates_version(path: str = FX_RATES_PATH) -> str:
+    """Changes whenever the rate table does; part of the parse cache's processing version."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return f"constant:{USD_TO_INR_RATE}"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+def _local_days(dates) -> np.ndarray:
+    # wall-clock day in the dates' own time zone, as days since epoch
+    idx = pd.DatetimeIndex(dates)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    return idx.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+def conversion_rates(currencies, dates, table: Optional[RateTable] = None) -> np.ndarray:
+    """
+    Rate into BASE_CURRENCY for each (currency, date) pair, as an as-of join on
+    the rate table: currencies are factorized, and every distinct currency is
+    looked up with one binary search over the whole column. NaN where unknown.
+    Warns (StaleRateWarning) when a rate table's newest rate is used for days
+    more than FX_RATES_MAX_AGE_DAYS after it.
+    """
+    table = table or load_rates()
+    codes, uniques = pd.factorize(np.asarray(currencies, dtype=object))  # missing -> -1 -> NaN
+    days = _local_days(dates)
+    out = np.full(len(codes), np.nan)
+    for i, code in enumerate(uniques):
+        sel = codes == i
+        code = str(code).strip().upper()
+        out[sel] = table.lookup(code, days[sel])
+        stale = _stale_days(table, code, days[sel])
+        if stale:
+            warnings.warn(stale, StaleRateWarning, stacklevel=2)
+    return out
+
+def _stale_days(table: RateTable, currency: str, days: np.ndarray) -> Optional[str]:
+    # the constant fallback is not a dated table; conversion_issues reports it
+    last = table.last_day(currency)
+    if last is None or table is _fallback_table():
+        return None
+    n = int((days > last + FX_RATES_MAX_AGE_DAYS).sum())
+    if not n:
+        return None
+    since = pd.Timestamp(last, unit="D").date()
+    return (f"{n:,} {currency} amount(s) dated over {FX_RATES_MAX_AGE_DAYS} days after the newest "
+            f"{currency} rate ({since}) were converted at that rate; update the FX rate table.")
+
+def conversion_issues(df: pd.DataFrame, table: Optional[RateTable] = None) -> List[str]:
+    """
+    Messages about foreign-currency amounts of processed transactions (columns
+    date and original_currency) that were not converted at a current rate:
+    unknown currencies (left as stated), rates older than FX_RATES_MAX_AGE_DAYS,
+    and USD converted at the USD_TO_INR_RATE constant when there is no table.
+    """
+    if df.empty or "original_currency" not in df.columns:
+        return []
+    table = table or load_rates()
+    currency = df["original_currency"].astype(object).where(df["original_currency"].notna(), BASE_CURRENCY)
+    currency = currency.astype(str).str.strip().str.upper().to_numpy()
+    foreign = currency != BASE_CURRENCY
+    if not foreign.any():
+        return []
+    days = _local_days(df["date"])[foreign]
+    issues = []
+    codes, uniques = pd.factorize(currency[foreign])
+    for i, code in enumerate(uniques):
+        sel = codes == i
+        n = int(sel.sum())
+        if table.last_day(code) is None:
+            issues.append(f"{n:,} {code} amount(s) left unconverted: the FX rate table has no {code} rates.")
+        elif table is _fallback_table():
+            issues.append(f"{n:,} {code} amount(s) converted at the constant {USD_TO_INR_RATE}; "
+                          f"add an FX rate table at {FX_RATES_PATH} for dated rates.")
+        else:
+            stale = _stale_days(table, code, days[sel])
+            if stale:
+                issues.append(stale)
+    return issues
+
+def import_rates(src: str, dest: str = FX_RATES_PATH) -> int:
+    """
+    Merge a rate table exported elsewhere (CSV or Parquet, RATE_COLUMNS) into the
+    local one at `dest`; rows from `src` replace existing rows for the same
+    (date, currency). Returns the number of rows in the merged table.
+    """
+    new = read_rates(src)
+    if os.path.exists(dest):
+        new = pd.concat([read_rates(dest), new], ignore_index=True)
+    merged = (new.dropna(subset=RATE_COLUMNS)
+                 .drop_duplicates(["date", "currency"], keep="last")
+                 .sort_values(["currency", "date"]))
+    tmp = dest + ".tmp"
+    if dest.endswith(".parquet"):
+        merged.to_parquet(tmp, index=False)
+    else:
+        merged.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp, dest)
+    return len(merged)
@@ -0,0 +1,88 @@
+# Date-sorted frames and range selection
+# utils/daterange.py
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import TIMEZONE
+
+def sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return df with dates in TIMEZONE, rows without a date dropped, sorted by date
+    and indexed by a (monotonic) DatetimeIndex so slice_by_date can binary-search it.
+    The 'date' column is kept as well.
+    """
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    if dates.dt.tz is None:
+        dates = dates.dt.tz_localize(TIMEZONE, nonexistent="shift_forward", ambiguous="NaT")
+    else:
+        dates = dates.dt.tz_convert(TIMEZONE)
+    d = df.assign(date=dates)
+    d = d[d["date"].notna()].sort_values("date", kind="stable")
+    d.index = pd.DatetimeIndex(d["date"].array)
+    return d
+
+def date_bounds(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> Optional[Tuple[int, int]]:
+    """
+    Positions [lo, hi) of the rows with start <= date <= end on a frame from
+    sort_by_date (two binary searches), or None for frames without a sorted index.
+    Two ranges with the same bounds select exactly the same rows.
+    """
+    idx = df.index
+    if isinstance(idx, pd.DatetimeIndex) and idx.tz is not None and idx.is_monotonic_increasing:
+        lo = idx.searchsorted(pd.Timestamp(start).tz_convert(idx.tz), side="left")
+        hi = idx.searchsorted(pd.Timestamp(end).tz_convert(idx.tz), side="right")
+        return int(lo), int(hi)
+    return None
+
+def slice_by_date(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """
+    Rows with start <= date <= end. On frames from sort_by_date this is two
+    binary searches and a positional slice (no mask, no copy); other frames
+    fall back to a boolean mask.
+    """
+    bounds = date_bounds(df, start, end)
+    if bounds is not None:
+        return df.iloc[bounds[0]:bounds[1]]
+    return df[(df["date"] >= start) & (df["date"] <= end)]
+
+def _merge_categorical(a: pd.Categorical, b: pd.Categorical) -> Tuple[np.ndarray, pd.CategoricalDtype]:
+    # codes of a followed by b under one dtype; a's dtype (and its hash table) is
+    # reused unless b brings new values, in which case the union is sorted
+    a_cats = a.categories
+    new = b.categories.difference(a_cats)
+    if new.empty:
+        dtype, a_codes = a.dtype, a.codes
+    else:
+        dtype = pd.CategoricalDtype(a_cats.append(new).sort_values())
+        a_codes = _recode(a, dtype)
+    return np.concatenate([a_codes, _recode(b, dtype)]), dtype
+
+def _recode(c: pd.Categorical, dtype: pd.CategoricalDtype) -> np.ndarray:
+    # c's codes under dtype; missing (-1) stays -1, also when c has no categories
+    return np.append(dtype.categories.get_indexer(c.categories), -1)[c.codes]
+
+def insert_sorted(df: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge `rows` into `df` (both from sort_by_date, same columns) without
+    re-sorting: each new row is placed by binary search, after existing rows
+    with the same timestamp, as a stable sort of the concatenation would.
+    Categorical columns stay dictionary-encoded (new values extend the
+    categories, kept sorted).
+    """
+    if rows.empty:
+        return df
+    if df.empty:
+        return rows
+    pos = df.index.searchsorted(rows.index, side="right")
+    order = np.insert(np.arange(len(df)), pos, np.arange(len(df), len(df) + len(rows)))
+    out = {}
+    for col in df.columns:
+        a, b = df[col].array, rows[col].array
+        if isinstance(a, pd.Categorical) and isinstance(b, pd.Categorical):
+            codes, dtype = _merge_categorical(a, b)
+            out[col] = pd.Categorical.from_codes(codes[order], dtype=dtype)
+        else:
+            out[col] = pd.concat([pd.Series(a), pd.Series(b)], ignore_index=True).array.take(order)
+    merged = pd.DataFrame(out)
+    merged.index = pd.DatetimeIndex(merged["date"].array)
+    return merged
@@ -1,11 +1,25 @@
 # utils/file_handler.py
 
+import hashlib
 import os
 import shutil
+import threading
+import time
+from typing import Optional
 import pandas as pd
+from config.settings import UPLOAD_STORE_DIR, UPLOAD_STORE_MAX_MB, UPLOAD_STORE_RETENTION_DAYS
+from utils.preprocess import parse_dates
+from utils.instrument import instrumented
+
+# ingest jobs store uploads concurrently; writes and eviction take turns
+_store_lock = threading.Lock()
 
 def save_uploaded_file(uploaded_file, save_dir="uploads"):
-    """Save file uploaded via Streamlit uploader and return its path."""
+    """
+    Save file uploaded via Streamlit uploader and return its path.
+    Same-named uploads overwrite each other; the app parses uploads in memory
+    and keeps optional copies with store_upload instead.
+    """
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
     file_path = os.path.join(save_dir, uploaded_file.name)
@@ -14,6 +28,52 @@ def save_uploaded_file(uploaded_file, save_dir="uploads"):
     return file_path
 
 
+def store_upload(data, store_dir: str = UPLOAD_STORE_DIR, suffix: str = ".csv") -> Optional[str]:
+    """
+    Keep a raw copy of uploaded bytes (bytes or memoryview) under the SHA-256 of
+    their content and return its path. Identical uploads share one file, whatever
+    their names; the directory is then trimmed by age and size (_evict_uploads).
+    Best effort: returns None if the copy cannot be written.
+    """
+    path = os.path.join(store_dir, hashlib.sha256(data).hexdigest() + suffix)
+    try:
+        with _store_lock:
+            os.makedirs(store_dir, exist_ok=True)
+            if os.path.exists(path):
+                os.utime(path)  # mark as recently used for eviction
+            else:
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            _evict_uploads(store_dir, suffix)
+    except OSError:
+        return None
+    return path
+
+
+def _evict_uploads(store_dir: str, suffix: str = ".csv",
+                   max_bytes: int = UPLOAD_STORE_MAX_MB * 1024 * 1024,
+                   max_age: float = UPLOAD_STORE_RETENTION_DAYS * 86400):
+    """Delete stored uploads older than max_age seconds, then least recently used ones until under max_bytes."""
+    entries = []
+    for name in os.listdir(store_dir):
+        if not name.endswith(suffix):
+            continue
+        st = os.stat(os.path.join(store_dir, name))
+        entries.append((st.st_mtime, st.st_size, name))
+    cutoff = time.time() - max_age
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, name in sorted(entries):
+        if total <= max_bytes and mtime >= cutoff:
+            break
+        try:
+            os.remove(os.path.join(store_dir, name))
+        except OSError:
+            continue
+        total -= size
+
+
 def save_file(file_path, save_dir="uploads"):
     """Copy an existing local file to uploads folder and return new path."""
     if not os.path.exists(save_dir):
@@ -27,7 +87,10 @@ def save_file(file_path, save_dir="uploads"):
 #     """Load CSV file into a DataFrame (helper if needed)."""
 #     return pd.read_csv(file_path)
 
+@instrumented("load_file")
 def load_file(path):
+    # Legacy loader with a fixed lower-case schema; statements are ingested with
+    # utils.preprocess.read_statement, which keeps every column the cleaner needs.
     import pandas as pd
     try:
         df = pd.read_csv(path)
@@ -52,7 +115,7 @@ def load_file(path):
         df = df[expected_cols]
 
         # Convert types
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df["date"] = parse_dates(df["date"])
         df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0)
 
         return df
@@ -0,0 +1,104 @@
+# Persistent transaction history
+# utils/history.py
+import os
+import threading
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from config.settings import HISTORY_DIR, TIMEZONE
+from utils.preprocess import compact_transactions
+from utils.daterange import sort_by_date, slice_by_date
+
+# Transactions are stored as one Parquet file per calendar month: <root>/YYYY-MM.parquet
+DEDUP_KEYS = ["date", "description", "amount"]
+# ingest jobs and manual entries append concurrently; each append reads and rewrites partitions
+_write_lock = threading.Lock()
+
+def _partition_path(root: str, month: str) -> str:
+    return os.path.join(root, f"{month}.parquet")
+
+def list_months(root: str = HISTORY_DIR) -> List[str]:
+    """Months (YYYY-MM) that have a partition, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name[:-len(".parquet")] for name in os.listdir(root) if name.endswith(".parquet"))
+
+def _month(ts) -> str:
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_convert(TIMEZONE) if ts.tz is not None else ts
+    return ts.strftime("%Y-%m")
+
+def _dedup_key(df: pd.DataFrame) -> pd.MultiIndex:
+    # amounts compared in whole paise so float noise cannot split duplicates
+    return pd.MultiIndex.from_arrays([
+        df["date"].to_numpy(dtype="datetime64[ns]").astype(np.int64),
+        df["description"].astype(str).to_numpy(),
+        np.round(df["amount"].to_numpy(dtype=float) * 100).astype(np.int64),
+    ])
+
+def _not_stored(rows: pd.DataFrame, existing: pd.DataFrame) -> np.ndarray:
+    # rows repeating a stored row; the n-th repeat of a key is only a duplicate when
+    # the history already has n of them (two equal coffees in one day both count)
+    new_key, stored_key = _dedup_key(rows), _dedup_key(existing)
+    stored = pd.Series(1, index=stored_key).groupby(level=[0, 1, 2]).size()
+    seen = pd.Series(0, index=new_key).groupby(level=[0, 1, 2]).cumcount().to_numpy()
+    have = stored.reindex(new_key, fill_value=0).to_numpy()
+    return seen >= have
+
+def append_transactions(df: pd.DataFrame, root: str = HISTORY_DIR, dedup: bool = True) -> int:
+    """
+    Add processed transactions to the history and return how many were new.
+    With `dedup` (uploads), rows already stored with the same (date, description,
+    amount) are skipped, as many times as they are stored, so a re-uploaded
+    statement adds nothing while repeated purchases within it are kept. Manual
+    entries are appended with dedup=False. Only the month partitions the new
+    rows fall in are read and rewritten, one append at a time per process.
+    """
+    d = sort_by_date(compact_transactions(df)).reset_index(drop=True)
+    if d.empty:
+        return 0
+    with _write_lock:
+        return _append(d, root, dedup)
+
+def _append(d: pd.DataFrame, root: str, dedup: bool) -> int:
+    os.makedirs(root, exist_ok=True)
+    added = 0
+    months = d["date"].dt.strftime("%Y-%m")
+    for month, rows in d.groupby(months.to_numpy(), sort=True):
+        path = _partition_path(root, month)
+        if os.path.exists(path):
+            existing = pd.read_parquet(path)
+            if dedup:
+                rows = rows[_not_stored(rows, existing)]
+            if rows.empty:
+                continue
+            merged = pd.concat([existing, rows], ignore_index=True)
+        else:
+            merged = rows
+        merged = sort_by_date(compact_transactions(merged))
+        tmp = path + ".tmp"
+        merged.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        added += len(rows)
+    return added
+
+def load_history(start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+                 root: str = HISTORY_DIR) -> pd.DataFrame:
+    """
+    Stored transactions with start <= date <= end (either bound optional), in the
+    compact, date-sorted form. Only partitions for months in the range are read.
+    """
+    months = list_months(root)
+    if start is not None:
+        months = [m for m in months if m >= _month(start)]
+    if end is not None:
+        months = [m for m in months if m <= _month(end)]
+    if not months:
+        return sort_by_date(compact_transactions(pd.DataFrame(columns=DEDUP_KEYS)))
+    frames = [pd.read_parquet(_partition_path(root, m)) for m in months]
+    # concat de-categorizes when categories differ; compact re-encodes once
+    d = sort_by_date(compact_transactions(pd.concat(frames, ignore_index=True)))
+    if d.empty or (start is None and end is None):
+        return d
+    return slice_by_date(d, start if start is not None else d["date"].iloc[0],
+                         end if end is not None else d["date"].iloc[-1])
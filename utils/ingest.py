@@ -0,0 +1,176 @@
+# Statement ingestion (one or many files)
+# utils/ingest.py
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from utils.preprocess import read_statement, compact_transactions
+from utils.daterange import sort_by_date
+from agents.categorizer import categorize_transactions, classify_descriptions
+from utils.instrument import instrumented
+from config.settings import TRANSFER_WINDOW_DAYS
+
+def _reader(data):
+    """Binary file object over statement bytes without copying them where possible."""
+    if isinstance(data, (bytes, memoryview)):
+        return io.BytesIO(data)  # shares a bytes object's buffer until written to
+    if isinstance(data, (str, os.PathLike)):
+        return data  # a file path; pandas opens and reads it
+    data.seek(0)  # already a binary file object, e.g. a Streamlit UploadedFile
+    return data
+
+def _to_bytes(data) -> bytes:
+    # worker processes receive a pickled copy, which memoryviews and uploads cannot provide
+    if isinstance(data, bytes):
+        return data
+    return bytes(data) if isinstance(data, memoryview) else bytes(data.getbuffer())
+
+def process_statement(data) -> pd.DataFrame:
+    """
+    Parse, clean and categorize one CSV statement (compact form) from its raw
+    bytes, a memoryview over them, a binary file object read in place, or a path.
+    """
+    df = read_statement(_reader(data))  # one pass: schema, dates, amounts
+    df = categorize_transactions(df)
+
+    # Keep only the analysed columns, dictionary-encoded
+    return compact_transactions(df)
+
+def pool_context(preload: Sequence[str] = ("utils.ingest",)):
+    """
+    Multiprocessing context for worker pools. forkserver children start from a
+    clean single-threaded process (the Streamlit server is multi-threaded) with
+    the `preload` modules already imported; spawn where it is unavailable.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(list(preload))
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+def process_statements(files: Dict[str, object], max_workers: Optional[int] = None,
+                       on_done: Optional[Callable[[str, Optional[pd.DataFrame]], None]] = None
+                       ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    Run process_statement for every {name: bytes | memoryview | binary file} item,
+    one file per worker process. A single file is parsed in this process, straight
+    from the given buffer. Returns ({name: frame}, {name: error message}) so one
+    bad file does not sink the rest. `on_done(name, frame or None)` is called as
+    each file finishes, e.g. to report progress.
+    """
+    results, errors = {}, {}
+    if len(files) <= 1:
+        for name, data in files.items():
+            try:
+                results[name] = process_statement(data)
+            except Exception as e:
+                errors[name] = str(e)
+            if on_done is not None:
+                on_done(name, results.get(name))
+        return results, errors
+
+    workers = max_workers or min(len(files), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+        futures = {pool.submit(process_statement, _to_bytes(data)): name for name, data in files.items()}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                errors[name] = str(e)
+            if on_done is not None:
+                on_done(name, results.get(name))
+    return results, errors
+
+def account_name(file_name: str) -> str:
+    """Source account label for an uploaded file, e.g. 'hdfc_savings.csv' -> 'hdfc_savings'."""
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+def account_names(file_names: Sequence[str]) -> List[str]:
+    """
+    Distinct account labels for a batch of files, in order: account_name of each,
+    with ' (2)', ' (3)', ... added to repeats, so two exports both called
+    'statement.csv' stay two accounts ('statement', 'statement (2)').
+    """
+    labels, taken = [], set()
+    for name in file_names:
+        base = label = account_name(name)
+        n = 1
+        while label in taken:
+            n += 1
+            label = f"{base} ({n})"
+        taken.add(label)
+        labels.append(label)
+    return labels
+
+def _transfer_pairs(out_legs: pd.DataFrame, in_legs: pd.DataFrame, window_days: int) -> pd.DataFrame:
+    # candidates of equal amount in other accounts at most window_days apart: legs are
+    # bucketed by day (window_days + 1 days per bucket), so each only meets its own
+    # and the neighbouring buckets rather than every same-amount leg in the history
+    width = window_days + 1
+    in_legs = in_legs.assign(bucket=in_legs["day"] // width)
+    pairs = pd.concat([out_legs.assign(bucket=out_legs["day"] // width + shift)
+                               .merge(in_legs, on=["paise", "bucket"], suffixes=("_out", "_in"))
+                       for shift in (-1, 0, 1)], ignore_index=True)
+    pairs["gap"] = (pairs["day_out"] - pairs["day_in"]).abs()
+    pairs = pairs[(pairs["gap"] <= window_days) & (pairs["account_out"] != pairs["account_in"])]
+    return pairs.sort_values(["gap", "out", "in"], kind="stable")
+
+def _drop_internal_transfers(d: pd.DataFrame, window_days: int = TRANSFER_WINDOW_DAYS) -> pd.DataFrame:
+    """
+    Remove transfers between two of the user's accounts, which would otherwise be
+    counted as spending on one side and income on the other: a 'Transfers' expense
+    in one account is paired with an equal income in another account dated at
+    most `window_days` later or earlier whose narration also matches the
+    Transfers rules (NEFT, IMPS, "transfer", ...), and both legs are dropped.
+    Each leg is used once, closest dates first. Every other row is kept,
+    including identical charges on different accounts and same-amount refunds
+    or repayments.
+    """
+    d = d.reset_index(drop=True)
+    if d["account"].nunique() < 2:
+        return d
+    day = d["date"].dt.normalize().to_numpy(dtype="datetime64[D]").astype(np.int64)
+    paise = np.round(d["amount"].to_numpy(dtype=float) * 100).astype(np.int64)
+    income_paise = np.round(d["income"].to_numpy(dtype=float) * 100).astype(np.int64)
+    account = d["account"].astype(str).to_numpy()
+
+    out_idx = np.flatnonzero((d["category"].astype(str) == "Transfers").to_numpy() & (paise > 0))
+    in_idx = np.flatnonzero(income_paise > 0)
+    if len(in_idx):
+        # incomes are categorized 'Income' by value; their narration tells transfers apart
+        narration = classify_descriptions(d["description"].astype(str).iloc[in_idx])
+        in_idx = in_idx[(narration == "Transfers").to_numpy()]
+    if not len(out_idx) or not len(in_idx):
+        return d
+    out_legs = pd.DataFrame({"out": out_idx, "paise": paise[out_idx], "day": day[out_idx],
+                             "account": account[out_idx]})
+    in_legs = pd.DataFrame({"in": in_idx, "paise": income_paise[in_idx], "day": day[in_idx],
+                            "account": account[in_idx]})
+    pairs = _transfer_pairs(out_legs, in_legs, window_days)
+
+    # greedy matching in rounds: a pair first in order for both its legs is taken, pairs
+    # sharing a leg with it are dropped (the same result as taking pairs one by one)
+    drop = []
+    while len(pairs):
+        take = ~pairs["out"].duplicated() & ~pairs["in"].duplicated()
+        taken = pairs[take]
+        drop += [taken["out"].to_numpy(), taken["in"].to_numpy()]
+        pairs = pairs[~pairs["out"].isin(taken["out"]) & ~pairs["in"].isin(taken["in"])]
+    return d.drop(index=np.concatenate(drop)) if drop else d
+
+@instrumented("merge_statements")
+def merge_statements(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combine processed statements keyed by account name: every row is tagged with
+    its 'account', transfers between the accounts are removed, and the result is
+    compact and date-sorted.
+    """
+    if not frames:
+        return sort_by_date(compact_transactions(pd.DataFrame(columns=["date"])))
+    tagged = [f.assign(account=name) for name, f in frames.items()]
+    merged = compact_transactions(pd.concat(tagged, ignore_index=True))
+    return sort_by_date(_drop_internal_transfers(merged))
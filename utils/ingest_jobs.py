@@ -0,0 +1,177 @@
+# Background ingestion of uploaded statements
+# utils/ingest_jobs.py
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+import pandas as pd
+from config.settings import HISTORY_ENABLED, UPLOAD_STORE_ENABLED, INGEST_WORKERS, INGEST_JOBS_KEPT
+from config.settings import INGEST_RESULTS_KEPT
+from utils.file_handler import store_upload
+from utils.history import append_transactions, load_history
+from utils.ingest import process_statements, merge_statements
+from utils.parse_cache import get_cached, put_cached
+import utils.instrument as instrument
+
+# Jobs are process-wide, so a rerun, a second tab or another session submitting
+# the same files attaches to the job already running instead of starting over.
+_jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+def job_id(keys: Iterable[Tuple[str, str]], history: bool = HISTORY_ENABLED) -> str:
+    """Id of the job for a set of uploads ((account label, parse cache key) pairs), independent of order."""
+    h = hashlib.sha256(b"history" if history else b"session")
+    for account, key in sorted(keys):
+        h.update(f"{account}\0{key}\0".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+class IngestJob:
+    """
+    One batch of uploads being parsed, categorized, merged and (optionally)
+    saved to history. Progress fields are updated by the worker thread; the
+    dataset is published in one assignment when everything has succeeded, so
+    readers see either no result or the complete one. Sessions get it with
+    take_result(), after which the job only holds it weakly: the frame lives as
+    long as some session still shows it, not as long as the job is remembered.
+    """
+
+    def __init__(self, id: str, names: Iterable[str]):
+        self.id = id
+        self.names = list(names)
+        self.state = "queued"          # queued -> running -> done | failed
+        self.stage = "queued"
+        self.files_done = 0
+        self.rows = 0
+        self.errors: Dict[str, str] = {}
+        self.added: Optional[int] = None
+        self.result: Optional[pd.DataFrame] = None
+        self._taken: Optional[weakref.ref] = None
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def _update(self, **fields):
+        with self._lock:
+            for k, v in fields.items():
+                setattr(self, k, v)
+
+    def take_result(self) -> Optional[pd.DataFrame]:
+        """
+        The published dataset, or None if there is none or every session that
+        took it has since dropped it (resubmit; parsed files are in the parse
+        cache). The job's own reference is released.
+        """
+        with self._lock:
+            result, self.result = self.result, None
+            if result is not None:
+                self._taken = weakref.ref(result)
+            return result if self._taken is None else self._taken()
+
+    def _release(self):
+        # from here on the result lives only while some session holds it
+        with self._lock:
+            if self.result is not None:
+                self._taken, self.result = weakref.ref(self.result), None
+
+    def status(self) -> dict:
+        """Consistent snapshot of the progress fields."""
+        with self._lock:
+            return {
+                "id": self.id, "state": self.state, "stage": self.stage,
+                "files_done": self.files_done, "files_total": len(self.names),
+                "rows": self.rows, "errors": dict(self.errors), "added": self.added,
+                "seconds": (self.finished or time.time()) - self.submitted,
+            }
+
+def get_job(id: Optional[str]) -> Optional[IngestJob]:
+    with _jobs_lock:
+        return _jobs.get(id) if id else None
+
+def submit(files: Dict[str, bytes], keys: Dict[str, str], history: bool = HISTORY_ENABLED) -> IngestJob:
+    """
+    Start ingesting {account label: bytes} (keys: {account label: parse cache
+    key}; labels from utils.ingest.account_names) in the background and return
+    the job. If a job for the same accounts and contents is still queued or
+    running, that job is returned instead. Finished jobs are not reused (history
+    may have changed since); their parsed files come from the parse cache.
+    """
+    id = job_id(keys.items(), history)
+    with _jobs_lock:
+        job = _jobs.get(id)
+        if job is not None and job.running:
+            _jobs.move_to_end(id)
+            return job
+        job = _jobs[id] = IngestJob(id, files)
+        while len(_jobs) > INGEST_JOBS_KEPT:
+            oldest = next(iter(_jobs.values()))
+            if oldest.running:
+                break
+            _jobs.popitem(last=False)
+    _executor.submit(_run, job, files, keys, history)
+    return job
+
+def _run(job: IngestJob, files: Dict[str, bytes], keys: Dict[str, str], history: bool):
+    try:
+        job._update(state="running", stage="parsing")
+        with instrument.stage("ingest") as s:
+            frames = ingest(job, files, keys, history)
+            s.rows = job.rows
+        job._update(result=frames, state="done", stage="done", finished=time.time())
+    except Exception as e:
+        job._update(state="failed", stage=f"failed: {e}", finished=time.time())
+    _release_untaken()
+
+def _release_untaken():
+    # abandoned sessions never take their result; hold only the newest few strongly
+    with _jobs_lock:
+        untaken = [j for j in _jobs.values() if j.result is not None]
+    for j in untaken[:-INGEST_RESULTS_KEPT or None]:
+        j._release()
+
+def _count(job: IngestJob, frame: Optional[pd.DataFrame]):
+    with job._lock:
+        job.files_done += 1
+        job.rows += 0 if frame is None else len(frame)
+
+def ingest(job: IngestJob, files: Dict[str, bytes], keys: Dict[str, str], history: bool) -> pd.DataFrame:
+    """
+    The ingestion pipeline run by the worker: parse cache lookups, parsing and
+    categorization of the rest (one worker process per file), account tagging
+    and cross-account dedup, then the history append. Returns the dataset to
+    publish: the whole history when `history` is on, else the merged uploads.
+    """
+    frames = {}
+    for name in files:
+        frames[name] = get_cached(keys[name])
+        if frames[name] is not None:
+            _count(job, frames[name])
+    pending = {name: data for name, data in files.items() if frames[name] is None}
+    if pending:
+        if UPLOAD_STORE_ENABLED:
+            for data in pending.values():
+                store_upload(data)  # raw copy named by content, size/age capped
+        parsed, errors = process_statements(pending, on_done=lambda name, f: _count(job, f))
+        for name, frame in parsed.items():
+            frames[name] = put_cached(keys[name], frame)
+        job._update(errors=errors)
+
+    frames = {name: f for name, f in frames.items() if f is not None}
+    if not frames:
+        raise ValueError("No file could be processed.")
+    job._update(stage="merging")
+    # tag rows with their account and drop transfers between them
+    df = merge_statements(frames)
+    if not history:
+        return df
+    job._update(stage="saving to history")
+    # history dedups rows already stored by earlier sessions
+    job._update(added=append_transactions(df))
+    return load_history()
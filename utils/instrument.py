@@ -0,0 +1,172 @@
+# Per-stage timing / memory instrumentation
+# utils/instrument.py
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import pandas as pd
+from config.settings import INSTRUMENTATION_ENABLED, INSTRUMENTATION_MEMORY
+
+# Disabled (the default), stage() returns a shared no-op context manager and
+# instrumented functions are called straight through.
+_enabled = False
+_memory = False
+
+# records of the current run (one Streamlit rerun / CLI invocation), per thread
+_run: ContextVar[Optional[List[dict]]] = ContextVar("instrument_run", default=None)
+# stack of open stages in this thread, for nested peak-memory accounting
+_open: ContextVar[tuple] = ContextVar("instrument_open", default=())
+# event counts of the current run (e.g. cache hits), per thread
+_run_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar("instrument_counts", default=None)
+# process-wide totals per stage and per event, for Prometheus
+_totals: Dict[str, dict] = {}
+_counts: Dict[str, int] = {}
+_totals_lock = threading.Lock()
+
+def enable(on: bool = True, memory: bool = INSTRUMENTATION_MEMORY):
+    """Turn recording on or off. memory=True also traces allocations (tracemalloc; slower)."""
+    global _enabled, _memory
+    _enabled, _memory = on, on and memory
+    if _memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def enabled() -> bool:
+    return _enabled
+
+def new_run() -> List[dict]:
+    """Start collecting a fresh list of stage records in this context and return it."""
+    records: List[dict] = []
+    _run.set(records)
+    _run_counts.set({})
+    return records
+
+def records() -> List[dict]:
+    """Stage records of the current run, in completion order."""
+    return list(_run.get() or [])
+
+def count(event: str, n: int = 1):
+    """Add n to the counter `event` (current run and process totals). No-op while disabled."""
+    if not _enabled:
+        return
+    run = _run_counts.get()
+    if run is not None:
+        run[event] = run.get(event, 0) + n
+    with _totals_lock:
+        _counts[event] = _counts.get(event, 0) + n
+
+def counts() -> Dict[str, int]:
+    """Event counters of the current run."""
+    return dict(_run_counts.get() or {})
+
+class _Stage:
+    __slots__ = ("name", "rows", "peak")
+
+    def __init__(self, name: str, rows: Optional[int]):
+        self.name, self.rows, self.peak = name, rows, 0
+
+# yielded while disabled, so `with stage(...) as s: s.rows = n` works either way
+_NOOP = nullcontext(_Stage("", None))
+
+@contextmanager
+def _measure(name: str, rows: Optional[int]):
+    st = _Stage(name, rows)
+    parent = _open.get()
+    token = _open.set(parent + (st,))
+    if _memory:
+        current, peak = tracemalloc.get_traced_memory()
+        for p in parent:  # keep the enclosing stages' peaks before resetting
+            p.peak = max(p.peak, peak)
+        tracemalloc.reset_peak()
+        base = current
+    t0 = time.perf_counter()
+    try:
+        yield st
+    finally:
+        seconds = time.perf_counter() - t0
+        _open.reset(token)
+        peak_bytes = None
+        if _memory:
+            peak = max(st.peak, tracemalloc.get_traced_memory()[1])
+            for p in parent:
+                p.peak = max(p.peak, peak)
+            peak_bytes = max(0, peak - base)
+        _record(name, seconds, st.rows, peak_bytes)
+
+def stage(name: str, rows: Optional[int] = None):
+    """
+    Context manager timing a block as stage `name`:
+        with stage("merge", rows=len(df)) as s: ...
+    `s.rows` may also be set inside the block. No-op while disabled.
+    """
+    if not _enabled:
+        return _NOOP
+    return _measure(name, rows)
+
+def instrumented(name: str):
+    """Decorator form of stage(); rows = length of the first DataFrame argument."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            rows = next((len(a) for a in args if isinstance(a, pd.DataFrame)), None)
+            with _measure(name, rows):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def _record(name: str, seconds: float, rows: Optional[int], peak_bytes: Optional[int]):
+    rec = {"stage": name, "seconds": seconds, "rows": rows, "peak_bytes": peak_bytes, "ts": time.time()}
+    run = _run.get()
+    if run is not None:
+        run.append(rec)
+    with _totals_lock:
+        t = _totals.setdefault(name, {"count": 0, "seconds": 0.0, "rows": 0, "peak_bytes": 0})
+        t["count"] += 1
+        t["seconds"] += seconds
+        t["rows"] += rows or 0
+        t["peak_bytes"] = max(t["peak_bytes"], peak_bytes or 0)
+
+def to_json(recs: Optional[List[dict]] = None) -> str:
+    """The current run's records (or `recs`) as a JSON array."""
+    return json.dumps(records() if recs is None else recs, indent=2)
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def to_prometheus(prefix: str = "finance_stage", events_prefix: str = "finance") -> str:
+    """Process-wide totals per stage and event counters in the Prometheus text exposition format."""
+    with _totals_lock:
+        totals = {k: dict(v) for k, v in _totals.items()}
+        events = dict(_counts)
+    metrics = [
+        ("seconds_total", "counter", "Wall time spent in the stage.", "seconds"),
+        ("calls_total", "counter", "Times the stage ran.", "count"),
+        ("rows_total", "counter", "Rows processed by the stage.", "rows"),
+        ("peak_bytes", "gauge", "Largest peak traced allocation of one call.", "peak_bytes"),
+    ]
+    lines = []
+    for suffix, kind, help_text, field in metrics:
+        lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+        lines.append(f"# TYPE {prefix}_{suffix} {kind}")
+        for name, t in sorted(totals.items()):
+            lines.append(f'{prefix}_{suffix}{{stage="{_label(name)}"}} {t[field]}')
+    lines.append(f"# HELP {events_prefix}_events_total Times the event occurred.")
+    lines.append(f"# TYPE {events_prefix}_events_total counter")
+    for name, n in sorted(events.items()):
+        lines.append(f'{events_prefix}_events_total{{event="{_label(name)}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+def reset_totals():
+    with _totals_lock:
+        _totals.clear()
+        _counts.clear()
+
+if INSTRUMENTATION_ENABLED:
+    enable(True)
@@ -0,0 +1,76 @@
+# Manually entered transactions
+# utils/manual_entries.py
+from typing import Dict
+import numpy as np
+import pandas as pd
+from config.settings import TIMEZONE, BASE_CURRENCY
+from utils.preprocess import TRANSACTION_COLUMNS, extract_merchants
+from utils.daterange import sort_by_date
+
+def _categorical(codes: np.ndarray, values: Dict[str, int]) -> pd.Categorical:
+    # sorted categories, as compact_transactions would produce
+    cat = pd.Categorical.from_codes(codes, categories=list(values))
+    return cat.set_categories(sorted(values))
+
+class ManualEntries:
+    """
+    Append-only, typed columnar buffer of manual transactions: dates (UTC ns) and
+    amounts live in growable NumPy arrays, descriptions and categories as integer
+    codes into insertion-ordered dictionaries. `version` increases on every append,
+    so consumers can tell whether anything changed without building a frame.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self._dates = np.empty(capacity, dtype=np.int64)
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._desc_codes = np.empty(capacity, dtype=np.int32)
+        self._cat_codes = np.empty(capacity, dtype=np.int32)
+        self._descriptions: Dict[str, int] = {}
+        self._categories: Dict[str, int] = {}
+        self._n = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self):
+        cap = 2 * len(self._dates)
+        for name in ("_dates", "_amounts", "_desc_codes", "_cat_codes"):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def append(self, date, description: str, category: str, amount: float):
+        """Add one expense; naive dates are taken to be in TIMEZONE."""
+        if self._n == len(self._dates):
+            self._grow()
+        ts = pd.Timestamp(date)
+        ts = ts.tz_localize(TIMEZONE) if ts.tz is None else ts
+        i = self._n
+        self._dates[i] = ts.value
+        self._amounts[i] = round(float(amount), 2)
+        self._desc_codes[i] = self._descriptions.setdefault(str(description), len(self._descriptions))
+        self._cat_codes[i] = self._categories.setdefault(str(category), len(self._categories))
+        self._n += 1
+        self.version += 1
+
+    def frame(self, start: int = 0) -> pd.DataFrame:
+        """Entries from position `start` on, in the compact, date-sorted form (see sort_by_date)."""
+        sl = slice(start, self._n)
+        n = self._n - min(start, self._n)
+        dates = pd.DatetimeIndex(self._dates[sl].astype("datetime64[ns]")).tz_localize("UTC").tz_convert(TIMEZONE)
+        description = _categorical(self._desc_codes[sl], self._descriptions)
+        out = pd.DataFrame({
+            "date": dates,
+            "description": description,
+            "merchant": extract_merchants(pd.Series(description)).array,
+            "category": _categorical(self._cat_codes[sl], self._categories),
+            "amount": self._amounts[sl].copy(),
+            "income": np.zeros(n),
+            "currency": pd.Categorical([BASE_CURRENCY] * n),
+            "account": pd.Categorical(["manual"] * n),
+            "original_amount": self._amounts[sl].copy(),
+            "original_currency": pd.Categorical([BASE_CURRENCY] * n),
+        })
+        return sort_by_date(out[TRANSACTION_COLUMNS])
@@ -0,0 +1,100 @@
+# Merchant ids and per-merchant aggregates
+# utils/merchants.py
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+import pandas as pd
+from config.settings import MERCHANT_DICT_PATH, MERCHANT_DICT_ENTRIES
+
+class MerchantDictionary:
+    """
+    Canonical merchant name -> integer id, stable across sessions: ids are never
+    reused, and the mapping is kept in a JSON file. Only the `max_entries` most
+    recently seen merchants are kept; an evicted merchant seen again gets a new id.
+    Safe to share between threads (sessions): lookups and saves take a lock.
+    """
+
+    def __init__(self, path: Optional[str] = MERCHANT_DICT_PATH, max_entries: int = MERCHANT_DICT_ENTRIES):
+        self.path, self.max_entries = path, max_entries
+        self._ids: "OrderedDict[str, int]" = OrderedDict()  # least recently used first
+        self._next_id = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                self._ids = OrderedDict((name, int(i)) for name, i in state["merchants"])
+                self._next_id = int(state["next_id"])
+            except (OSError, ValueError, KeyError, TypeError):
+                pass  # unreadable file: start over with fresh ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def ids(self, merchants: pd.Series) -> np.ndarray:
+        """Id per row (-1 where missing); each distinct merchant is looked up once."""
+        codes, uniques = pd.factorize(merchants)
+        unique_ids = np.empty(len(uniques) + 1, dtype=np.int64)
+        unique_ids[-1] = -1
+        with self._lock:
+            for i, name in enumerate(map(str, uniques)):
+                if name in self._ids:
+                    self._ids.move_to_end(name)  # recency is written with the next new merchant
+                else:
+                    self._ids[name] = self._next_id
+                    self._next_id += 1
+                    self._dirty = True
+                unique_ids[i] = self._ids[name]
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+        return unique_ids[codes]
+
+    def save(self):
+        """Write the dictionary (atomically) if it changed since it was loaded or saved."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"next_id": self._next_id, "merchants": list(self._ids.items())}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+_shared: Optional[MerchantDictionary] = None
+_shared_lock = threading.Lock()
+
+def merchant_dictionary() -> MerchantDictionary:
+    """Process-wide dictionary at MERCHANT_DICT_PATH, loaded on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MerchantDictionary()
+        return _shared
+
+def merchant_totals(df: pd.DataFrame, top_n: Optional[int] = None,
+                    dictionary: Optional[MerchantDictionary] = None) -> pd.DataFrame:
+    """
+    Spending per merchant, largest first: merchant, amount, count, and
+    merchant_id from `dictionary` when one is given (e.g. merchant_dictionary()
+    for ids stable across sessions; it is saved here). Grouping runs on the
+    merchant Categorical's codes, so it costs one pass over the rows however
+    many distinct narrations there are.
+    """
+    cols = ["merchant", "amount", "count"] + ([] if dictionary is None else ["merchant_id"])
+    if df.empty or "merchant" not in df.columns:
+        return pd.DataFrame(columns=cols)
+    amount = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+    d = amount.groupby(df["merchant"], observed=True).agg(["sum", "size"])
+    d = d.rename(columns={"sum": "amount", "size": "count"}).rename_axis("merchant").reset_index()
+    d = d[d["amount"] > 0].sort_values("amount", ascending=False, kind="stable")
+    if top_n is not None:
+        d = d.head(top_n)
+    if dictionary is not None:
+        d["merchant_id"] = dictionary.ids(d["merchant"].astype(str))
+        dictionary.save()
+    return d[cols].reset_index(drop=True)
@@ -0,0 +1,123 @@
+# Parse cache for processed uploads
+# utils/parse_cache.py
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import pandas as pd
+from config.settings import (
+    PARSE_CACHE_VERSION, PARSE_CACHE_DIR, PARSE_CACHE_MEMORY_ENTRIES, PARSE_CACHE_MAX_MB
+)
+
+# Process-wide, so reruns and other sessions uploading the same bytes share it
+_memory: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+# concurrent ingest jobs share both tiers: one lock per tier
+_memory_lock = threading.Lock()
+_disk_lock = threading.Lock()
+
+# Modules whose code shapes a processed upload; their source is part of the cache key
+PARSER_MODULES = ("utils.preprocess", "utils.currency_converter", "utils.ingest",
+                  "agents.categorizer", "agents.ml_categorizer")
+
+@functools.lru_cache(maxsize=None)
+def code_version(modules: Tuple[str, ...] = PARSER_MODULES) -> str:
+    """Hash of the parser modules' source files (read, not imported), so an upgrade invalidates the cache."""
+    h = hashlib.sha256()
+    for name in modules:
+        spec = importlib.util.find_spec(name)
+        with open(spec.origin, "rb") as f:
+            h.update(name.encode("utf-8") + b"\0" + f.read())
+    return h.hexdigest()[:16]
+
+def processing_version(*parts) -> str:
+    """
+    Fingerprint of everything besides the file bytes that shapes the parsed result:
+    PARSE_CACHE_VERSION, the parser code (code_version) and the given settings.
+    """
+    blob = json.dumps([PARSE_CACHE_VERSION, code_version(), *parts], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+def cache_key(data, version: str) -> str:
+    """Content address for uploaded bytes (bytes or memoryview) under a processing version."""
+    h = hashlib.sha256(version.encode("utf-8"))
+    h.update(data)
+    return h.hexdigest()
+
+def _disk_path(key: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{key}.parquet")
+
+def get_cached(key: str, cache_dir: str = PARSE_CACHE_DIR) -> Optional[pd.DataFrame]:
+    """Return the processed frame for `key` from memory, then disk, or None."""
+    with _memory_lock:
+        df = _memory.get(key)
+        if df is not None:
+            _memory.move_to_end(key)
+            return df
+    path = _disk_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        return None  # unreadable, or evicted by another job in between
+    try:
+        os.utime(path)  # mark as recently used for eviction
+    except OSError:
+        pass  # evicted since the read; the frame is still good
+    _remember(key, df)
+    return df
+
+def put_cached(key: str, df: pd.DataFrame, cache_dir: str = PARSE_CACHE_DIR) -> pd.DataFrame:
+    """
+    Store a processed frame in both tiers and return the stored frame.
+    Duplicate column names are dropped (keeping the first), as Parquet cannot hold them.
+    """
+    df = df.loc[:, ~df.columns.duplicated()]
+    _remember(key, df)
+    try:
+        with _disk_lock:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = _disk_path(key, cache_dir) + ".tmp"
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, _disk_path(key, cache_dir))
+            _evict_disk(cache_dir)
+    except Exception:
+        # disk tier is best effort (e.g. mixed-type object columns, read-only fs)
+        pass
+    return df
+
+def _remember(key: str, df: pd.DataFrame):
+    with _memory_lock:
+        _memory[key] = df
+        _memory.move_to_end(key)
+        while len(_memory) > PARSE_CACHE_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+def _evict_disk(cache_dir: str, max_bytes: int = PARSE_CACHE_MAX_MB * 1024 * 1024):
+    """Delete least recently used files until the directory fits in max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".parquet"):
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, name))
+        except OSError:
+            continue  # removed meanwhile (e.g. by another process)
+        entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        total -= size
+
+def clear_memory_cache():
+    with _memory_lock:
+        _memory.clear()
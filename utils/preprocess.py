@@ -2,11 +2,15 @@
 # utils/preprocess.py
 from __future__ import annotations
 import re
-from typing import Optional, Tuple, List
+import string
+from typing import Callable, Iterator, Optional, Tuple, List
 import pandas as pd
 import numpy as np
-from dateutil import tz
-from config.settings import TIMEZONE, BASE_CURRENCY, USD_TO_INR_RATE
+import pyarrow as pa
+import pyarrow.compute as pc
+from config.settings import TIMEZONE, BASE_CURRENCY
+from utils.instrument import instrumented
+from utils.currency_converter import conversion_rates
 
 DATE_CANDIDATES = [
     "Date","Transaction Date","Posting Date","Txn Date","Value Date"
@@ -20,6 +24,8 @@ AMOUNT_CANDIDATES = [
 ]
 DEBIT_CANDIDATES  = ["Debit","Withdrawal","DR","Debited"]
 CREDIT_CANDIDATES = ["Credit","Deposit","CR","Credited"]
+TYPE_CANDIDATES = ["Type","Transaction Type","Dr/Cr"]
+CURRENCY_CANDIDATES = ["Currency","Curr"]
 
 def _find_col(cols: List[str], candidates: List[str]) -> Optional[str]:
     for c in candidates:
@@ -32,47 +38,286 @@ def _find_col(cols: List[str], candidates: List[str]) -> Optional[str]:
             return lower[c.lower()]
     return None
 
+# Currency detection, checked in order; markers match ASCII case-insensitively
+CURRENCY_MARKERS = {
+    "INR": ["₹", "inr", "rs."],
+    "USD": ["$", "usd"],
+    "EUR": ["€", "eur"],
+    "GBP": ["£", "gbp"],
+}
+# Symbols written in a Currency column instead of ISO codes
+CURRENCY_SYMBOLS = {"₹": "INR", "$": "USD", "€": "EUR", "£": "GBP", "RS.": "INR", "RS": "INR"}
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+# Parenthesized amounts ("(1,200.00)", "₹(50)") and a trailing Cr are money in
+# (negative); a trailing Dr is an expense (positive).
+_NEGATIVE_PATTERN = r"^[^0-9\-]*\([^()]*\)[^0-9]*$|(?:^|[^a-zA-Z])(?i:cr)\.?$"
+_DEBIT_MARK_PATTERN = r"(?:^|[^a-zA-Z])(?i:dr)\.?$"
+# "Rs." goes as a whole so its dot is not read as a decimal point
+_RS_PREFIX_PATTERN = r"(?i:\brs\.)"
+_NON_NUMERIC_PATTERN = r"[^0-9\.\-]"
+_NUMBER_PATTERN = r"^-?(?:\d+\.?\d*|\.\d+)$"
+
 def _strip_currency_and_parse(x: str) -> Tuple[Optional[float], Optional[str]]:
     """Return (number, currency) if possible."""
     if pd.isna(x):
         return None, None
     s = str(x).strip()
     currency = None
-    if "₹" in s or "INR" in s.upper():
-        currency = "INR"
-    elif "$" in s or "USD" in s.upper():
-        currency = "USD"
+    lowered = s.translate(_ASCII_LOWER)
+    for code, markers in CURRENCY_MARKERS.items():
+        if any(m in lowered for m in markers):
+            currency = code
+            break
     # keep digits, - and .
-    cleaned = re.sub(r"[^0-9\.\-]", "", s)
+    cleaned = re.sub(_NON_NUMERIC_PATTERN, "", re.sub(_RS_PREFIX_PATTERN, "", s))
     if cleaned in ("", "-", ".", "-.", ".-"):
         return None, currency
     try:
-        return float(cleaned), currency
+        value = float(cleaned)
     except ValueError:
         return None, currency
+    if re.search(_NEGATIVE_PATTERN, s):
+        value = -abs(value)
+    elif re.search(_DEBIT_MARK_PATTERN, s):
+        value = abs(value)
+    return value, currency
+
+def _keep_numeric_chars(arr: pa.LargeStringArray) -> pa.LargeStringArray:
+    """Drop every byte except ASCII digits, '.' and '-', directly on the UTF-8 buffer."""
+    _, offsets, data = arr.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, dtype=np.uint8)
+    data = data[offsets[0]:offsets[-1]]
+    keep = ((data >= 48) & (data <= 57)) | (data == 46) | (data == 45)
+    kept_before = np.concatenate([[0], np.cumsum(keep, dtype=np.int64)])
+    return pa.LargeStringArray.from_buffers(
+        len(arr), pa.py_buffer(kept_before[offsets - offsets[0]]), pa.py_buffer(data[keep])
+    )
+
+def _parse_amount_column(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Column-level equivalent of mapping _strip_currency_and_parse.
+    Returns (float amounts with NaN for unparseable, currency hint or None).
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(float), pd.Series(None, index=series.index, dtype=object)
+
+    try:
+        arr = pa.array(series.to_numpy(), type=pa.large_string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed numbers and text
+        arr = pa.array(series.astype(str).to_numpy(), type=pa.large_string())
+    # missing values parse to (NaN, None) via the empty string, like the scalar path
+    s = pc.utf8_trim_whitespace(pc.fill_null(arr, ""))
+    lowered = pc.ascii_lower(s)
+
+    def flags(pattern: str) -> np.ndarray:
+        return pc.match_substring_regex(s, pattern).to_numpy(zero_copy_only=False)
+
+    def has_any(markers: List[str]) -> np.ndarray:
+        return np.logical_or.reduce([pc.match_substring(lowered, m).to_numpy(zero_copy_only=False)
+                                     for m in markers])
+
+    currency = np.select([has_any(m) for m in CURRENCY_MARKERS.values()],
+                         list(CURRENCY_MARKERS), default=None).astype(object)
+
+    # only "Rs." needs a regex rewrite; everything else is filtered byte by byte
+    if pc.any(pc.match_substring_regex(s, _RS_PREFIX_PATTERN)).as_py():
+        cleaned = _keep_numeric_chars(pc.replace_substring_regex(s, _RS_PREFIX_PATTERN, ""))
+    else:
+        cleaned = _keep_numeric_chars(s)
+    # anything float() would reject becomes null before the (exact) Arrow cast
+    valid = pc.match_substring_regex(cleaned, _NUMBER_PATTERN)
+    values = pc.cast(pc.if_else(valid, cleaned, None), pa.float64()).to_numpy(zero_copy_only=False)
+    values = np.where(flags(_NEGATIVE_PATTERN), -np.abs(values),
+                      np.where(flags(_DEBIT_MARK_PATTERN), np.abs(values), values))
+
+    return (pd.Series(values, index=series.index, dtype=float),
+            pd.Series(currency, index=series.index, dtype=object))
+
+# Explicit formats tried when sniffing a date column; day-first before month-first,
+# so an ambiguous sample (every day <= 12) reads the Indian way
+DATE_FORMATS = [
+    "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%d-%m-%y",
+    "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S",
+    "%d %b %Y", "%d-%b-%Y", "%d-%b-%y", "%d %B %Y", "%b %d, %Y",
+    "%m/%d/%Y", "%m-%d-%Y", "%m/%d/%y",
+]
+DATE_SNIFF_SAMPLE = 200
+
+def sniff_date_format(values: pd.Series, sample: int = DATE_SNIFF_SAMPLE) -> Optional[str]:
+    """The DATE_FORMATS entry that parses most of an evenly spaced sample of `values` (None if none does)."""
+    if values.empty:
+        return None
+    pos = np.unique(np.linspace(0, len(values) - 1, num=min(sample, len(values))).astype(int))
+    probe = values.iloc[pos]
+    best, best_ok = None, 0
+    for fmt in DATE_FORMATS:
+        ok = int(pd.to_datetime(probe, format=fmt, errors="coerce").notna().sum())
+        if ok > best_ok:
+            best, best_ok = fmt, ok
+            if ok == len(probe):
+                break
+    return best
+
+def _localize(s: pd.Series) -> pd.Series:
+    # naive -> TIMEZONE; tz-aware -> converted to TIMEZONE
+    if s.dt.tz is None:
+        return s.dt.tz_localize(TIMEZONE, nonexistent="NaT", ambiguous="NaT")
+    return s.dt.tz_convert(TIMEZONE)
+
+# numeric day/month formats: the only ones whose field order is ambiguous
+_MONTH_FIRST_FORMATS = {f for f in DATE_FORMATS if f.startswith("%m")}
+_DAY_FIRST_FORMATS = {f for f in DATE_FORMATS if f.startswith("%d") and "%m" in f}
+_FORMAT_FIELDS = {"%Y": r"\d{4}", "%y": r"\d{2}", "%m": r"\d{1,2}", "%d": r"\d{1,2}", "%H": r"\d{1,2}",
+                  "%M": r"\d{1,2}", "%S": r"\d{1,2}", "%b": r"[A-Za-z]{3}", "%B": r"[A-Za-z]+"}
+_TEXT_MONTH_PATTERN = r"(?i)\b(?:" + "|".join(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]) + r")[a-z]*\b"
+
+_UTC_OFFSET_PATTERN = r"(?:Z|[+-]\d{2}:?\d{2})$"
+# each numeric format's counterpart with day and month swapped, where both are known
+_SWAPPED_FORMATS = {f: g for f in DATE_FORMATS
+                    for g in [f.replace("%d", "\0").replace("%m", "%d").replace("\0", "%m")]
+                    if g != f and g in DATE_FORMATS}
+
+def _format_shape(fmt: str) -> str:
+    # regex matching the layout of `fmt` whatever the field values, e.g. %Y-%m-%d -> \d{4}-\d{1,2}-\d{1,2}
+    return "".join(_FORMAT_FIELDS.get(tok, re.escape(tok)) for tok in re.findall(r"%.|[^%]+", fmt))
 
-def _ensure_datetime(series: pd.Series) -> pd.Series:
-    # try dayfirst=True (common in India), fallback to False
-    s = pd.to_datetime(series, errors="coerce", dayfirst=True, infer_datetime_format=True)
-    if s.isna().all():
-        s = pd.to_datetime(series, errors="coerce", dayfirst=False, infer_datetime_format=True)
-    # localize to timezone (naive -> tz-aware)
+def _naive(parsed: pd.Series) -> pd.Series:
+    if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+        return parsed.dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    return parsed
+
+def _parse_other_layouts(text: pd.Series, month_first: bool) -> pd.Series:
+    """
+    Dates in a different layout than the column's sniffed format. Day and month
+    are read in the column's order and never swapped per value, so an impossible
+    month (2024-13-01) is NaT rather than a guess: the other explicit formats of
+    that order first, then ISO 8601, then text months (01 Aug 2025 10:00).
+    """
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    skip = _DAY_FIRST_FORMATS if month_first else _MONTH_FIRST_FORMATS
+    for fmt in DATE_FORMATS:
+        todo = parsed.isna().to_numpy()
+        if not todo.any():
+            return parsed
+        if fmt not in skip:
+            parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce")
+    todo = parsed.isna().to_numpy()
+    if todo.any():
+        # values with a UTC offset become instants (their offsets may differ); the rest stay wall-clock
+        offset = todo & text.str.contains(_UTC_OFFSET_PATTERN).to_numpy()
+        for rows, utc in ((offset, True), (todo & ~offset, False)):
+            if rows.any():
+                parsed[rows] = _naive(pd.to_datetime(text[rows], format="ISO8601", utc=utc, errors="coerce"))
+    todo = parsed.isna().to_numpy() & text.str.contains(_TEXT_MONTH_PATTERN).to_numpy()
+    if todo.any():
+        parsed[todo] = _naive(pd.to_datetime(text[todo], format="mixed", dayfirst=not month_first,
+                                             errors="coerce"))
+    return parsed
+
+def parse_dates(series: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    """
+    Parse a statement date column to tz-aware TIMEZONE timestamps (NaT where invalid).
+    Every distinct string is parsed and localized once, with a single format:
+    `fmt`, e.g. sniffed once for a whole file (sniff_file_date_format), else one
+    sniffed from a sample of the column. Values in that format's layout that it
+    rejects (31/02/2024, 2024-13-01) are NaT; values in other layouts are parsed
+    in the column's day/month order (_parse_other_layouts). Columns that are
+    already datetimes are only localized.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return _localize(series)
+    codes, uniques = pd.factorize(series)  # missing values -> code -1
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    fmt = sniff_date_format(text) if fmt is None else fmt
+    if fmt is not None:
+        parsed = pd.to_datetime(text, format=fmt, errors="coerce")
+        missing = parsed.isna().to_numpy()
+        # rejected values in the format's own layout are invalid dates, not another layout
+        missing[missing] = ~text[missing].str.fullmatch(_format_shape(fmt)).to_numpy()
+    else:
+        parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+        missing = np.ones(len(text), dtype=bool)
+    if missing.any():
+        parsed[missing] = _parse_other_layouts(text[missing], month_first=fmt in _MONTH_FIRST_FORMATS)
+    dates = _localize(parsed).array.take(codes, allow_fill=True)
+    return pd.Series(dates, index=series.index, name=series.name)
+
+# Merchant extraction. Narrations like "UPI/123456789/SWIGGY BANGALORE/okaxis"
+# are reduced to a key (digits, UPI handles and dates removed) and then to a
+# merchant name (payment channel, city and legal-suffix words removed).
+_MONTHS = "jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec"
+_MERCHANT_DATE_PATTERN = (r"\b\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}\b"
+                          r"|\b\d{1,2}[ -]?(?:" + _MONTHS + r")[a-z]*[ -]?\d{2,4}\b")
+_UPI_HANDLE_PATTERN = r"@[a-z0-9._-]+|/(?:ok[a-z]+|ybl|ibl|axl|apl|upi|paytm)\s*$"
+_SEPARATOR_PATTERN = r"[/\\|*_:#,;()\[\]-]+"
+# masked card numbers (4111XXXX1111) whole, otherwise digit runs only: letters
+# glued to them are kept (SWIGGY1234 -> swiggy, IRCTC12 -> irctc)
+_REFERENCE_PATTERN = r"\b[x*]*\d[\dx*]*x[\dx*]*\b|\bx+\d[\dx*]*\b|\d+"
+MERCHANT_NOISE_WORDS = [
+    # payment channels
+    "upi", "pos", "neft", "imps", "rtgs", "ach", "ecs", "nach", "atm", "vps", "ipay", "txn", "ref", "payment", "to",
+    # cities
+    "bangalore", "bengaluru", "mumbai", "delhi", "new delhi", "pune", "hyderabad", "chennai", "kolkata",
+    "gurgaon", "gurugram", "noida", "ahmedabad", "jaipur",
+    # legal suffixes
+    "pvt", "private", "ltd", "limited", "llp", "inc", "india", "in", "co",
+]
+_NOISE_PATTERN = (r"(?:\s|\b(?:" + "|".join(re.escape(w) for w in sorted(MERCHANT_NOISE_WORDS, key=len, reverse=True))
+                  + r")\b)+")
+UNKNOWN_MERCHANT = "UNKNOWN"
+
+# One regex pass removes all of them and squeezes the whitespace around them;
+# dates go first so their separators and digits are not split off on their own
+_MERCHANT_STRIP_PATTERN = "(?:" + "|".join([r"\s", _MERCHANT_DATE_PATTERN, _UPI_HANDLE_PATTERN,
+                                            _SEPARATOR_PATTERN, _REFERENCE_PATTERN]) + ")+"
+
+def _squeeze(arr: pa.Array, pattern: str) -> pa.Array:
+    return pc.utf8_trim_whitespace(pc.replace_substring_regex(arr, pattern, " "))
+
+def _text_array(values: np.ndarray) -> pa.LargeStringArray:
     try:
-        s = s.dt.tz_localize(TIMEZONE, nonexistent="NaT", ambiguous="NaT")
-    except Exception:
-        # if already tz-aware or error, just convert
-        try:
-            s = s.dt.tz_convert(TIMEZONE)
-        except Exception:
-            pass
-    return s
+        return pa.array(values, type=pa.large_string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([str(v) for v in values], type=pa.large_string())
+
+def merchant_keys(descriptions: pd.Series) -> pd.Series:
+    """
+    Lower-cased descriptions without digits, UPI handles and dates, the
+    grouping key for merchant names (categories are matched on the full
+    narration). Each distinct description is processed once, over Arrow
+    string arrays.
+    """
+    codes, uniques = pd.factorize(descriptions)  # missing -> -1 -> ""
+    lowered = pc.utf8_lower(_text_array(np.asarray(uniques, dtype=object)))
+    keys = _squeeze(lowered, _MERCHANT_STRIP_PATTERN)
+    keys = np.append(np.asarray(keys.to_numpy(zero_copy_only=False), dtype=object), "")
+    return pd.Series(keys[codes], index=descriptions.index, dtype=object)
+
+def extract_merchants(descriptions: pd.Series, keys: Optional[pd.Series] = None) -> pd.Series:
+    """
+    Canonical merchant name per description ("SWIGGY" for the narration above) as
+    a Categorical; UNKNOWN_MERCHANT where nothing but noise is left. Pass the
+    descriptions' merchant_keys if already computed; names are derived once per
+    distinct key.
+    """
+    keys = merchant_keys(descriptions) if keys is None else keys
+    codes, uniques = pd.factorize(keys)
+    names = _squeeze(_text_array(np.asarray(uniques, dtype=object)), _NOISE_PATTERN)
+    names = pc.utf8_upper(names)
+    names = pc.if_else(pc.equal(names, ""), UNKNOWN_MERCHANT, names).to_numpy(zero_copy_only=False)
+    categories = pd.Index(pd.unique(np.append(names, UNKNOWN_MERCHANT))).sort_values()
+    name_codes = np.append(categories.get_indexer(names), categories.get_loc(UNKNOWN_MERCHANT))
+    return pd.Series(pd.Categorical.from_codes(name_codes[codes], categories=categories),
+                     index=descriptions.index)
 
 def _standardize_amounts(df: pd.DataFrame, original_amount_col: Optional[str]) -> pd.DataFrame:
     df = df.copy()
     if original_amount_col:
-        nums, currs = zip(*df[original_amount_col].map(_strip_currency_and_parse))
-        df["_amount_raw"] = pd.Series(nums, index=df.index)
-        df["_currency_hint"] = pd.Series(currs, index=df.index)
+        df["_amount_raw"], df["_currency_hint"] = _parse_amount_column(df[original_amount_col])
     else:
         df["_amount_raw"] = np.nan
         df["_currency_hint"] = None
@@ -82,14 +327,15 @@ def _standardize_amounts(df: pd.DataFrame, original_amount_col: Optional[str]) -
     credit_col = _find_col(list(df.columns), CREDIT_CANDIDATES)
     if debit_col or credit_col:
         # Parse debit/credit values
+        # Dr/Cr markers and parentheses only carry sign; the column decides direction
         if debit_col:
-            df["_debit"], _ = zip(*df[debit_col].map(_strip_currency_and_parse))
+            df["_debit"] = _parse_amount_column(df[debit_col])[0].abs()
         else:
-            df["_debit"] =  [0.0]*len(df)
+            df["_debit"] = 0.0
         if credit_col:
-            df["_credit"], _ = zip(*df[credit_col].map(_strip_currency_and_parse))
+            df["_credit"] = _parse_amount_column(df[credit_col])[0].abs()
         else:
-            df["_credit"] = [0.0]*len(df)
+            df["_credit"] = 0.0
         # Expenses = positive, Income = positive
         df["expense"] = pd.to_numeric(df["_debit"]).fillna(0.0)
         df["income"]  = pd.to_numeric(df["_credit"]).fillna(0.0)
@@ -97,7 +343,7 @@ def _standardize_amounts(df: pd.DataFrame, original_amount_col: Optional[str]) -
         # Single Amount column -> assume positive = expense by default
         amt = pd.to_numeric(df["_amount_raw"], errors="coerce").fillna(0.0)
         # Heuristic: if there's a 'Type' column with 'debit/credit', respect it
-        type_col = _find_col(list(df.columns), ["Type","Transaction Type","Dr/Cr"])
+        type_col = _find_col(list(df.columns), TYPE_CANDIDATES)
         if type_col:
             t = df[type_col].astype(str).str.lower()
             df["expense"] = np.where(t.str.contains("cr") | t.str.contains("credit"), 0.0, np.abs(amt))
@@ -107,18 +353,24 @@ def _standardize_amounts(df: pd.DataFrame, original_amount_col: Optional[str]) -
             df["expense"] = np.where(amt >= 0, amt, 0.0)
             df["income"]  = np.where(amt < 0,  -amt, 0.0)
 
-    # Currency column if present
-    currency_col = _find_col(list(df.columns), ["Currency","Curr"])
+    # Currency column if present (blank cells fall back to the amount's hint)
+    currency = df["_currency_hint"]
+    currency_col = _find_col(list(df.columns), CURRENCY_CANDIDATES)
     if currency_col:
-        df["currency"] = df[currency_col].astype(str).str.upper().str.replace("₹","INR").str.replace("$","USD")
-    else:
-        # Use hint else base currency
-        df["currency"] = df["_currency_hint"].fillna(BASE_CURRENCY)
+        stated = df[currency_col].astype("string").str.strip().str.upper()
+        stated = stated.replace(CURRENCY_SYMBOLS).mask(stated.eq(""))
+        currency = stated.astype(object).fillna(currency)
+    # Use hint else base currency
+    currency = currency.fillna(BASE_CURRENCY)
 
-    # Convert USD->INR for both expense & income (simple fallback)
-    is_usd = df["currency"].eq("USD")
-    df.loc[is_usd, "expense"] = df.loc[is_usd, "expense"] * USD_TO_INR_RATE
-    df.loc[is_usd, "income"]  = df.loc[is_usd, "income"]  * USD_TO_INR_RATE
+    # Convert to BASE_CURRENCY at each transaction day's rate (as-of join on the
+    # rate table); the amount and currency as stated are kept alongside
+    df["original_amount"] = df["expense"] - df["income"]
+    df["original_currency"] = currency
+    rates = conversion_rates(currency, df["date"])
+    rates = np.where(np.isnan(rates), 1.0, rates)  # unknown currency: left as stated
+    df["expense"] = df["expense"] * rates
+    df["income"] = df["income"] * rates
     df["currency"] = BASE_CURRENCY
 
     # Final unified 'amount' for expenses analysis
@@ -126,34 +378,193 @@ def _standardize_amounts(df: pd.DataFrame, original_amount_col: Optional[str]) -
 
     return df
 
-def load_and_clean(input_obj) -> pd.DataFrame:
-    """
-    input_obj: path-like, file-like (Streamlit UploadedFile), or DataFrame
-    Returns standardized DataFrame with columns:
-    ['date','description','amount','expense','income','currency'] (+ originals preserved)
-    """
-    if isinstance(input_obj, pd.DataFrame):
-        raw = input_obj.copy()
-    else:
-        raw = pd.read_csv(input_obj)
-
-    cols = list(raw.columns)
+def _detect_columns(cols: List[str]) -> Tuple[str, Optional[str], Optional[str]]:
+    """Return (date_col, desc_col, amount_col) for a bank export header."""
     date_col = _find_col(cols, DATE_CANDIDATES)
     desc_col = _find_col(cols, DESC_CANDIDATES)
     amount_col = _find_col(cols, AMOUNT_CANDIDATES)
-
     if date_col is None:
         raise ValueError("Could not detect a Date column. Rename one column to 'Date'.")
+    return date_col, desc_col, amount_col
+
+def _clean_frame(raw: pd.DataFrame, date_col: str, desc_col: Optional[str],
+                 amount_col: Optional[str], fmt: Optional[str] = None) -> pd.DataFrame:
+    """Normalize one frame of raw rows (dates in `fmt` if given). `raw` is modified in place."""
     if desc_col is None:
         # If no description-like column, create one
         raw["__Description"] = ""
         desc_col = "__Description"
+    originals = [c for c in raw.columns if c not in ("date","description")]
 
-    df = raw.copy()
-    df["date"] = _ensure_datetime(df[date_col])
-    df["description"] = df[desc_col].astype(str)
+    raw["date"] = parse_dates(raw[date_col], fmt=fmt)
+    raw["description"] = raw[desc_col].astype(str)
 
-    df = _standardize_amounts(df, amount_col)
+    df = _standardize_amounts(raw, amount_col)
     df = df.dropna(subset=["date"])  # drop rows with invalid dates
     df = df.sort_values("date").reset_index(drop=True)
-    return df[["date","description","amount","expense","income","currency"] + [c for c in raw.columns if c not in ("date","description")]]
+    return df[["date","description","amount","expense","income","currency",
+               "original_amount","original_currency"] + originals]
+
+@instrumented("load_and_clean")
+def load_and_clean(input_obj) -> pd.DataFrame:
+    """
+    input_obj: path-like, file-like (Streamlit UploadedFile), or DataFrame
+    Returns standardized DataFrame with columns:
+    ['date','description','amount','expense','income','currency',
+     'original_amount','original_currency'] (+ originals preserved)
+    Amounts are in BASE_CURRENCY; original_amount (money out positive) and
+    original_currency are as stated in the statement.
+    """
+    if not isinstance(input_obj, pd.DataFrame):
+        return read_statement(input_obj)
+    raw = input_obj.copy()
+    date_col, desc_col, amount_col = _detect_columns(list(raw.columns))
+    return _clean_frame(raw, date_col, desc_col, amount_col)
+
+def _read_header(input_obj) -> List[str]:
+    # column names only; file-like objects are rewound for the real read
+    if hasattr(input_obj, "seek"):
+        pos = input_obj.tell()
+        cols = pd.read_csv(input_obj, nrows=0).columns
+        input_obj.seek(pos)
+    else:
+        cols = pd.read_csv(input_obj, nrows=0).columns
+    return list(cols)
+
+def statement_columns(cols: List[str]) -> dict:
+    """The header columns load_and_clean uses, by role (None where absent)."""
+    date_col, desc_col, amount_col = _detect_columns(cols)
+    return {
+        "date": date_col,
+        "description": desc_col,
+        "amount": amount_col,
+        "debit": _find_col(cols, DEBIT_CANDIDATES),
+        "credit": _find_col(cols, CREDIT_CANDIDATES),
+        "type": _find_col(cols, TYPE_CANDIDATES),
+        "currency": _find_col(cols, CURRENCY_CANDIDATES),
+    }
+
+@instrumented("read_statement")
+def read_statement(input_obj) -> pd.DataFrame:
+    """
+    Read and standardize a CSV statement in one pass (same output as load_and_clean).
+    The header is read first to detect the schema; the body is then parsed once,
+    with only the columns in use (usecols) and all of them as text, so dates and
+    amounts go through their parsers exactly once. Debit/Credit, Type and Currency
+    columns are kept when present.
+    """
+    roles = statement_columns(_read_header(input_obj))
+    usecols = [c for c in dict.fromkeys(roles.values()) if c is not None]
+    raw = pd.read_csv(input_obj, usecols=usecols, dtype={c: str for c in usecols})
+    return _clean_frame(raw, roles["date"], roles["description"], roles["amount"])
+
+def sniff_file_date_format(input_obj, date_col: str, chunksize: int = 100_000) -> Optional[str]:
+    """
+    The date format of a whole CSV file, reading only its date column: sniffed
+    from the first chunk with dates, and when that chunk cannot tell day-first
+    from month-first (every day <= 12), decided by the first later value that
+    parses in only one of the two orders. File-like objects are rewound.
+    """
+    pos = input_obj.tell() if hasattr(input_obj, "seek") else None
+    fmt = None
+    try:
+        with pd.read_csv(input_obj, usecols=[date_col], dtype=str, chunksize=chunksize) as reader:
+            for chunk in reader:
+                text = pd.Series(chunk[date_col].dropna().unique()).str.strip()
+                fmt = sniff_date_format(text) if fmt is None else fmt
+                swapped = _SWAPPED_FORMATS.get(fmt)
+                if swapped is None:
+                    if fmt is not None:
+                        return fmt
+                    continue
+                ours = pd.to_datetime(text, format=fmt, errors="coerce").notna()
+                theirs = pd.to_datetime(text, format=swapped, errors="coerce").notna()
+                only_ours, only_theirs = int((ours & ~theirs).sum()), int((theirs & ~ours).sum())
+                if only_ours or only_theirs:
+                    return fmt if only_ours >= only_theirs else swapped
+    finally:
+        if pos is not None:
+            input_obj.seek(pos)
+    return fmt  # ambiguous throughout: sniff_date_format's day-first default
+
+def iter_clean_chunks(input_obj, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Streaming variant of load_and_clean for large CSV exports.
+    Yields standardized frames of at most `chunksize` rows; columns are detected
+    once from the header and only those in use are read, as text, and dates are
+    parsed with one format for the whole file (sniff_file_date_format), so every
+    chunk has the same schema and day/month order. Rows are sorted by date
+    within a chunk only.
+    """
+    roles = statement_columns(_read_header(input_obj))
+    fmt = sniff_file_date_format(input_obj, roles["date"], chunksize)
+    usecols = [c for c in dict.fromkeys(roles.values()) if c is not None]
+    reader = pd.read_csv(input_obj, chunksize=chunksize, usecols=usecols, dtype={c: str for c in usecols})
+    for raw in reader:
+        yield _clean_frame(raw, roles["date"], roles["description"], roles["amount"], fmt=fmt)
+
+def stream_to_parquet(input_obj, dest, chunksize: int = 100_000,
+                      transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> int:
+    """
+    Clean a CSV chunk by chunk into a Parquet file at `dest`, so peak memory is
+    bounded by `chunksize` rather than file size. `transform` is applied to each
+    cleaned chunk (e.g. agents.categorizer.categorize_transactions).
+    Returns the number of rows written.
+    """
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in iter_clean_chunks(input_obj, chunksize=chunksize):
+            if transform is not None:
+                chunk = transform(chunk)
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # all-empty text columns in the first chunk would otherwise be typed null
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                writer = pq.ParquetWriter(dest, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+TRANSACTION_COLUMNS = ["date","description","merchant","category","amount","income","currency","account",
+                       "original_amount","original_currency"]
+
+def compact_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Slim in-memory representation of processed transactions: only
+    TRANSACTION_COLUMNS are kept (raw bank columns are dropped), description,
+    category, currencies and source account are dictionary-encoded Categoricals,
+    and amounts are rounded to whole paise. Missing columns are filled with
+    empty/zero values.
+    """
+    df = df.loc[:, ~df.columns.duplicated()]
+    n = len(df)
+    out = pd.DataFrame(index=df.index)
+    out["date"] = df["date"] if "date" in df.columns else pd.NaT
+    for col in ("description","category","currency","account"):
+        values = df[col] if col in df.columns else pd.Series([None]*n, index=df.index, dtype=object)
+        out[col] = values.astype("category")
+    for col in ("amount","income"):
+        values = df[col] if col in df.columns else pd.Series(0.0, index=df.index)
+        out[col] = pd.to_numeric(values, errors="coerce").fillna(0.0).round(2)
+    # rows stored before amounts kept their original currency were already in `currency`
+    if "original_amount" in df.columns:
+        out["original_amount"] = pd.to_numeric(df["original_amount"], errors="coerce").round(2)
+    else:
+        out["original_amount"] = out["amount"] - out["income"]
+    if "original_currency" in df.columns:
+        out["original_currency"] = df["original_currency"].astype("category")
+    else:
+        out["original_currency"] = out["currency"]
+    if "merchant" in df.columns:
+        out["merchant"] = df["merchant"].astype("category")
+    else:
+        out["merchant"] = extract_merchants(out["description"])
+    return out[TRANSACTION_COLUMNS]
@@ -1,42 +1,56 @@
 # Chart/Plot Functions
 # utils/visualization.py
 import pandas as pd
-import plotly.express as px
+from config.settings import TREND_MAX_POINTS
+
+# plotly is imported by each builder, so it only loads when a figure is made
 
 def pie_by_category(df: pd.DataFrame):
     d = df.copy()
     if "category" not in d.columns or "amount" not in d.columns:
         return None
-    d = d.groupby("category", as_index=False)["amount"].sum()
+    d = d.groupby("category", as_index=False, observed=True)["amount"].sum()
     d = d[d["amount"] > 0]
     if d.empty:
         return None
+    import plotly.express as px
     return px.pie(d, names="category", values="amount", title="Spending by Category")
 
 
-def trend_by_date(df: pd.DataFrame):
-    d = df.copy()
-    if "date" not in d.columns or "amount" not in d.columns:
-        return None
+def _daily_amounts(df: pd.DataFrame) -> pd.Series:
+    # amount per calendar day (wall-clock dates in the data's own timezone); no copy of df
+    dates = df["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    amount = df["amount"]
+    if not pd.api.types.is_numeric_dtype(amount):
+        amount = pd.to_numeric(amount, errors="coerce")
+    return amount.fillna(0.0).groupby(dates.dt.normalize().to_numpy()).sum()
 
-    # Ensure datetime and build a proper day column for grouping
-    d["date"] = pd.to_datetime(d["date"], errors="coerce")
-    # If tz-aware, drop tz to keep a clean daily index; then normalize to midnight
-    try:
-        if d["date"].dt.tz is not None:
-            d["day"] = d["date"].dt.tz_convert(None).dt.normalize()
-        else:
-            d["day"] = d["date"].dt.normalize()
-    except Exception:
-        d["day"] = pd.to_datetime(d["date"], errors="coerce").dt.normalize()
-
-    d = d.dropna(subset=["day"])
-    d["amount"] = pd.to_numeric(d["amount"], errors="coerce").fillna(0.0)
-    d = d.groupby("day", as_index=False)["amount"].sum()
 
-    if d.empty:
+def trend_by_date(df: pd.DataFrame, max_points: int = TREND_MAX_POINTS):
+    """
+    Spending per day, or per week/month when there would be more than
+    `max_points` days, so the figure stays small however long the history is.
+    """
+    if "date" not in df.columns or "amount" not in df.columns:
+        return None
+    daily = _daily_amounts(df)
+    if daily.empty:
         return None
-    return px.line(d, x="day", y="amount", title="Daily Spending Trend")
+
+    # calendar buckets keep the y-axis meaning "amount spent in the period"
+    d, title = daily, "Daily Spending Trend"
+    for rule, label in (("W-MON", "Weekly"), ("MS", "Monthly")):
+        if len(d) <= max_points:
+            break
+        d = daily.resample(rule, label="left", closed="left").sum()
+        title = f"{label} Spending Trend"
+    d = d.rename_axis("day").reset_index(name="amount")
+    import plotly.express as px
+    return px.line(d, x="day", y="amount", title=title)
 
 
 def bar_top_categories(df: pd.DataFrame, top_n: int = 5, title="Top Categories"):
@@ -44,8 +58,9 @@ def bar_top_categories(df: pd.DataFrame, top_n: int = 5, title="Top Categories")
     if "category" not in d.columns or "amount" not in d.columns:
         return None
     d["amount"] = pd.to_numeric(d["amount"], errors="coerce").fillna(0.0)
-    d = d.groupby("category", as_index=False)["amount"].sum().sort_values("amount", ascending=False)
+    d = d.groupby("category", as_index=False, observed=True)["amount"].sum().sort_values("amount", ascending=False)
     d = d[d["amount"] > 0].head(top_n)
     if d.empty:
         return None
+    import plotly.express as px
     return px.bar(d, x="category", y="amount", title=title)